@@ -0,0 +1,18 @@
+# benchmarks/_env.py
+"""Окружение бенчмарков: модули бота и настройки без .env.
+
+Бенчмарки запускаются из корня репозитория: python benchmarks/<имя>.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parents[1] / "bot"
+
+sys.path.insert(0, str(BOT_DIR))
+os.environ.setdefault("BOT_TOKEN", "123456:BENCH")
+os.environ.setdefault("OPENWEATHER_API_KEY", "bench")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='fitness-bot-bench-')}/fitness.db"
+)
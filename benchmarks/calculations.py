@@ -0,0 +1,80 @@
+# benchmarks/calculations.py
+"""Пересчет норм для большого числа пользователей: скалярные функции против NumPy.
+
+Скалярные функции измеряются на части пользователей (--scalar-sample),
+и время пересчитывается на всех: так не нужно держать в памяти миллион
+кортежей Python.
+
+    python benchmarks/calculations.py [--users 1000000] [--scalar-sample 100000]
+"""
+import argparse
+import time
+
+import _env  # noqa: F401
+
+import numpy as np
+
+from services.calculations import (
+    CALORIE_ACTIVITY_MULTIPLIERS, MET_VALUES,
+    calculate_goals, calculate_goals_batch,
+    calculate_workout_calories, calculate_workout_calories_batch,
+)
+
+
+def make_users(count: int, seed: int = 17) -> dict:
+    rng = np.random.default_rng(seed)
+    return {
+        "weights": rng.uniform(40, 150, count),
+        "heights": rng.uniform(140, 210, count),
+        "ages": rng.integers(14, 90, count),
+        "genders": rng.choice(["male", "female"], count),
+        "activity_levels": rng.choice(list(CALORIE_ACTIVITY_MULTIPLIERS), count),
+        "temperatures": rng.uniform(-20, 40, count),
+        "workout_types": rng.choice(list(MET_VALUES), count),
+        "durations": rng.integers(10, 180, count),
+    }
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def report(name: str, seconds: float, count: int):
+    print(f"  {name:<34} {seconds:8.3f} с  {count / seconds / 1e6:8.2f} млн/с")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--scalar-sample", type=int, default=100_000)
+    args = parser.parse_args()
+
+    users = make_users(args.users)
+    sample = min(args.scalar_sample, args.users)
+    # Скалярный путь получает обычные числа и строки Python, как из базы
+    rows = list(zip(users["weights"][:sample].tolist(), users["heights"][:sample].tolist(),
+                    users["ages"][:sample].tolist(), users["genders"][:sample].tolist(),
+                    users["activity_levels"][:sample].tolist(), users["temperatures"][:sample].tolist()))
+    workouts = list(zip(users["workout_types"][:sample].tolist(), users["durations"][:sample].tolist(),
+                        users["weights"][:sample].tolist()))
+
+    print(f"Пользователей: {args.users}")
+
+    scalar = timed(lambda: [calculate_goals(*row) for row in rows]) * args.users / sample
+    batch = timed(lambda: calculate_goals_batch(
+        users["weights"], users["heights"], users["ages"], users["genders"],
+        users["activity_levels"], users["temperatures"]))
+    report("calculate_goals", scalar, args.users)
+    report("calculate_goals_batch", batch, args.users)
+
+    scalar = timed(lambda: [calculate_workout_calories(*row) for row in workouts]) * args.users / sample
+    batch = timed(lambda: calculate_workout_calories_batch(
+        users["workout_types"], users["durations"], users["weights"]))
+    report("calculate_workout_calories", scalar, args.users)
+    report("calculate_workout_calories_batch", batch, args.users)
+
+
+if __name__ == "__main__":
+    main()
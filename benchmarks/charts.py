@@ -0,0 +1,115 @@
+# benchmarks/charts.py
+"""Скорость отрисовки графиков в одном процессе, графиков в секунду.
+
+  before - новая фигура на каждый график, tight_layout и bbox_inches='tight'
+           (отрисовка до шаблонов)
+  after  - шаблоны services/chart_worker.py: меняются только данные
+
+    python benchmarks/charts.py [--renders 50]
+"""
+import argparse
+import io
+import random
+import time
+
+import _env  # noqa: F401
+
+from services import chart_worker
+
+
+def _png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def before_daily(water_consumed, water_goal, calories_consumed, calories_burned, calorie_goal) -> bytes:
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 5))
+    axes = fig.subplots(1, 2)
+
+    water_values = [water_consumed, max(0, water_goal - water_consumed)]
+    axes[0].pie(water_values,
+                labels=[f'Выпито\n{water_consumed:.0f} мл', f'Осталось\n{water_values[1]:.0f} мл'],
+                colors=['#4CAF50', '#E0E0E0'],
+                autopct=lambda p: f'{p:.1f}%' if p > 0 else '',
+                startangle=90, textprops={'fontsize': 9})
+    axes[0].set_title('Прогресс по воде', fontsize=14, fontweight='bold')
+
+    values = [calories_consumed, calories_burned, calorie_goal]
+    bars = axes[1].bar(['Потреблено', 'Сожжено', 'Цель'], values,
+                       color=['#FF9800', '#2196F3', '#4CAF50'])
+    axes[1].set_ylabel('Ккал', fontsize=12)
+    axes[1].set_title('Баланс калорий', fontsize=14, fontweight='bold')
+    for bar, value in zip(bars, values):
+        axes[1].text(bar.get_x() + bar.get_width()/2., bar.get_height() + 10,
+                     f'{value:.0f}', ha='center', va='bottom', fontsize=9)
+
+    fig.tight_layout()
+    return _png(fig)
+
+
+def before_weekly(dates, water_values, calorie_values) -> bytes:
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 8))
+    axes = fig.subplots(2, 1)
+    series = [
+        (axes[0], water_values, '#4CAF50', 'Потребление воды за неделю', 'мл'),
+        (axes[1], calorie_values, '#FF9800', 'Потребление калорий за неделю', 'ккал'),
+    ]
+    for ax, values, color, title, ylabel in series:
+        ax.plot(dates, values, marker='o', color=color, linewidth=2)
+        ax.fill_between(dates, values, alpha=0.3, color=color)
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.grid(True, alpha=0.3)
+        for i, value in enumerate(values):
+            ax.text(i, value + 50, f'{value:.0f}', ha='center', va='bottom', fontsize=8)
+    axes[1].set_xlabel('Дата', fontsize=12)
+
+    fig.tight_layout()
+    return _png(fig)
+
+
+def daily_args(rng: random.Random) -> tuple:
+    return (rng.uniform(0, 3000), 2500.0, rng.uniform(0, 3000), rng.uniform(0, 800), 2200.0)
+
+
+def weekly_args(rng: random.Random) -> tuple:
+    days = rng.randint(2, 7)
+    return ([f"{10 + day}.10" for day in range(days)],
+            [rng.uniform(0, 3000) for _ in range(days)],
+            [rng.uniform(0, 3000) for _ in range(days)])
+
+
+def renders_per_second(render, make_args, renders: int) -> float:
+    rng = random.Random(20)
+    inputs = [make_args(rng) for _ in range(renders)]
+    for args in inputs[:3]:
+        render(*args)   # прогрев: шрифты и кэши matplotlib
+    started = time.perf_counter()
+    for args in inputs:
+        render(*args)
+    return renders / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=50)
+    args = parser.parse_args()
+
+    chart_worker.init_worker()
+    cases = [
+        ("daily", before_daily, chart_worker.render_daily_progress, daily_args),
+        ("weekly", before_weekly, chart_worker.render_weekly, weekly_args),
+    ]
+    for name, before, after, make_args in cases:
+        old = renders_per_second(before, make_args, args.renders)
+        new = renders_per_second(after, make_args, args.renders)
+        print(f"  {name:<7} before {old:6.1f}/с   after {new:6.1f}/с   x{new / old:.1f}")
+
+
+if __name__ == "__main__":
+    main()
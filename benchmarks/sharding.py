@@ -0,0 +1,124 @@
+# benchmarks/sharding.py
+"""Пропускная способность обработки обновлений в зависимости от WORKERS.
+
+Обработчик занимает процессор примерно как настоящий (разбор JSON и
+построение строк). 0 - без рабочих процессов (как при WORKERS=1).
+После каждого прогона проверяется, что все обновления обработаны и у
+каждого пользователя - по порядку. Рост с числом процессов возможен,
+только если ядер больше одного.
+
+    python benchmarks/sharding.py [--updates 4000] [--users 50] [--workers 0 1 2 4]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import _env  # noqa: F401
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message, Update
+
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+from sharding import ShardPool, create_front_dispatcher
+
+# Каталог журналов обработки; рабочие процессы получают его через окружение
+LOG_DIR_ENV = "SHARDING_BENCH_DIR"
+HANDLER_ROUNDS = 300
+
+
+def create_bench_dispatcher(background_jobs: bool = True):
+    """Фабрика диспетчера рабочего процесса (импортируется процессами по имени)"""
+    # Журнал каждого обновления занял бы больше времени, чем обработчик
+    logging.disable(logging.INFO)
+    router = Router()
+    log = open(Path(os.environ[LOG_DIR_ENV]) / f"handled_{os.getpid()}.log", "a", buffering=1)
+
+    @router.message()
+    async def handle(message: Message):
+        text = message.text
+        for _ in range(HANDLER_ROUNDS):
+            text = hashlib.sha256(json.dumps({"t": text, "x": list(range(20))}).encode()).hexdigest()
+        log.write(f"{message.from_user.id} {message.message_id}\n")
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    limiter = ConcurrencyLimitMiddleware(100)
+    dp.update.outer_middleware(limiter)
+    return dp, limiter
+
+
+def make_update(update_id: int, users: int) -> Update:
+    user_id = 1000 + update_id % users
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": f"m{update_id}",
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+        },
+    })
+
+
+def check_log(log_dir: Path, expected: int):
+    last_seen = {}
+    handled = 0
+    for path in log_dir.glob("handled_*.log"):
+        for line in path.read_text().splitlines():
+            user_id, message_id = map(int, line.split())
+            assert last_seen.get(user_id, -1) < message_id, f"нарушен порядок у {user_id}"
+            last_seen[user_id] = message_id
+            handled += 1
+    assert handled == expected, f"обработано {handled} из {expected}"
+
+
+async def run(workers: int, updates: list) -> float:
+    bot = Bot("123456:BENCH")
+    try:
+        if workers == 0:
+            dp, _ = create_bench_dispatcher()
+            started = time.perf_counter()
+            await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+            return len(updates) / (time.perf_counter() - started)
+
+        dp, _ = create_front_dispatcher(ShardPool(workers, create_bench_dispatcher))
+        await dp.emit_startup(bot=bot, dispatcher=dp)
+        # Ждем, пока процессы запустятся и обработают первое обновление
+        await dp.feed_update(bot, updates[0])
+        await asyncio.sleep(3)
+
+        started = time.perf_counter()
+        for update in updates[1:]:
+            await dp.feed_update(bot, update)
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        return (len(updates) - 1) / (time.perf_counter() - started)
+    finally:
+        await bot.session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    updates = [make_update(update_id, args.users) for update_id in range(args.updates)]
+    print(f"Ядер: {os.cpu_count()}, обновлений: {args.updates}, пользователей: {args.users}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as log_dir:
+            os.environ[LOG_DIR_ENV] = log_dir
+            rate = asyncio.run(run(workers, updates))
+            check_log(Path(log_dir), args.updates)
+        name = f"WORKERS={workers}" if workers else "без процессов"
+        print(f"  {name:<14} {rate:8.0f} обновлений/с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/weekly_summary.py
+"""Недельная сводка активного пользователя: тысячи записей в журналах за неделю.
+
+Сравниваются:
+  join      - прежний запрос: сырые журналы соединены с датами (и друг с другом)
+  per-table - агрегаты по каждому журналу отдельно, соединенные по дате
+  rollup    - чтение готовых итогов из daily_totals (get_weekly_summary)
+
+    python benchmarks/weekly_summary.py [--logs-per-week 2000] [--users 200]
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import _env  # noqa: F401
+
+from database.connection import connect
+from database.crud import _get_weekly_summary
+from database.migrations import migrate
+from database.rollup import _aggregates, rebuild_daily_totals
+
+USER_ID = 1
+
+JOIN_SQL = """
+    WITH RECURSIVE dates(date) AS (
+        SELECT DATE('now', '-6 days')
+        UNION ALL
+        SELECT DATE(date, '+1 day') FROM dates WHERE date < DATE('now')
+    )
+    SELECT dates.date,
+           COALESCE(SUM(w.amount), 0),
+           COALESCE(SUM(f.calories), 0),
+           COUNT(DISTINCT wo.id)
+    FROM dates
+    LEFT JOIN water_logs w ON DATE(w.timestamp) = dates.date AND w.user_id = ?
+    LEFT JOIN food_logs f ON DATE(f.timestamp) = dates.date AND f.user_id = ?
+    LEFT JOIN workout_logs wo ON DATE(wo.timestamp) = dates.date AND wo.user_id = ?
+    GROUP BY dates.date
+    ORDER BY dates.date
+"""
+
+
+def fill(conn, logs_per_week: int, users: int):
+    rng = random.Random(6)
+
+    def timestamps(count: int):
+        for _ in range(count):
+            seconds = rng.randint(0, 7 * 24 * 3600 - 1)
+            yield f"-{seconds} seconds"
+
+    # Пропорции как у реального пользователя: воды больше всего, тренировок мало
+    for user_id in range(1, users + 1):
+        count = logs_per_week if user_id == USER_ID else 30
+        conn.executemany(
+            "INSERT INTO water_logs (user_id, amount, timestamp) VALUES (?, ?, DATETIME('now', ?))",
+            [(user_id, rng.choice((150, 250, 500)), ts) for ts in timestamps(count * 6 // 10)]
+        )
+        conn.executemany(
+            "INSERT INTO food_logs (user_id, food_name, calories, timestamp) VALUES (?, 'еда', ?, DATETIME('now', ?))",
+            [(user_id, rng.uniform(50, 800), ts) for ts in timestamps(count * 3 // 10)]
+        )
+        conn.executemany(
+            "INSERT INTO workout_logs (user_id, workout_type, calories_burned, timestamp) VALUES (?, 'бег', ?, DATETIME('now', ?))",
+            [(user_id, rng.uniform(100, 500), ts) for ts in timestamps(count // 10)]
+        )
+    rebuild_daily_totals(conn)
+    conn.commit()
+
+
+def measure(func, min_time: float = 1.0) -> float:
+    """Среднее время одного вызова, мс"""
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logs-per-week", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(str(Path(tmp) / "bench.db"))
+        migrate(conn)
+        fill(conn, args.logs_per_week, args.users)
+
+        per_table_sql, params = _aggregates(USER_ID)
+        cases = {
+            "join": lambda: conn.execute(JOIN_SQL, (USER_ID,) * 3).fetchall(),
+            "per-table": lambda: conn.execute(per_table_sql, params).fetchall(),
+            "rollup": lambda: _get_weekly_summary(conn, USER_ID),
+        }
+
+        print(f"Пользователь с {args.logs_per_week} записями за неделю, всего пользователей {args.users}")
+        for name, func in cases.items():
+            print(f"  {name:<10} {measure(func):10.3f} мс")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
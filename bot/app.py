@@ -0,0 +1,85 @@
+# app.py
+"""Сборка диспетчера со всеми обработчиками.
+
+Используется и основным процессом бота, и рабочими процессами
+при обработке обновлений в нескольких процессах (см. sharding.py).
+"""
+import logging
+from typing import Tuple
+from aiogram import Dispatcher
+from config import settings
+from handlers import (
+    start, profile, water, food, 
+    workout, progress, recommendations
+)
+from database.pool import pool
+from database.fsm_storage import SQLiteStorage
+from database.write_queue import write_queue
+from services.http import init_http_session, close_http_session
+from services.goal_refresh import start_water_goal_refresh, stop_water_goal_refresh
+from services.stats import start_stats_log, stop_stats_log
+from services.visualizations import init_chart_pool, close_chart_pool
+from middlewares.logging_middleware import LoggingMiddleware
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+
+def setup_logging():
+    # Настраиваем логирование с детальной информацией
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("bot_logs.log", encoding="utf-8"),
+            logging.StreamHandler()
+        ]
+    )
+
+def create_dispatcher(background_jobs: bool = True) -> Tuple[Dispatcher, ConcurrencyLimitMiddleware]:
+    """Диспетчер с обработчиками, хранилищем FSM и хуками запуска/остановки.
+
+    background_jobs - запускать ли фоновый пересчет норм воды (при нескольких
+    процессах он работает только в одном из них).
+    """
+    # Состояния диалогов хранятся в базе и переживают перезапуск
+    storage = SQLiteStorage()
+    dp = Dispatcher(storage=storage)
+    
+    # Общая HTTP-сессия для внешних API живет все время работы бота
+    dp.startup.register(init_http_session)
+    dp.shutdown.register(close_http_session)
+    
+    # Фоновый пересчет норм воды по погоде
+    if background_jobs:
+        dp.startup.register(start_water_goal_refresh)
+        dp.shutdown.register(stop_water_goal_refresh)
+    
+    # Счетчики кэшей и внешних API в журнале (в каждом процессе свои)
+    dp.startup.register(start_stats_log)
+    dp.shutdown.register(stop_stats_log)
+    
+    # Процессы отрисовки графиков запускаются заранее
+    dp.startup.register(init_chart_pool)
+    dp.shutdown.register(close_chart_pool)
+    
+    # При остановке дописываем состояния FSM и очередь записи
+    # и закрываем соединения с БД
+    dp.shutdown.register(storage.close)
+    dp.shutdown.register(write_queue.close)
+    dp.shutdown.register(pool.close)
+    
+    # Ограничение одновременно обрабатываемых обновлений
+    limiter = ConcurrencyLimitMiddleware(settings.MAX_CONCURRENT_UPDATES)
+    dp.update.outer_middleware(limiter)
+    
+    # Добавляем middleware для логирования
+    dp.update.middleware(LoggingMiddleware())
+    
+    # Регистрация роутеров
+    dp.include_router(start.router)
+    dp.include_router(profile.router)
+    dp.include_router(water.router)
+    dp.include_router(food.router)
+    dp.include_router(workout.router)
+    dp.include_router(progress.router)
+    dp.include_router(recommendations.router)
+    
+    return dp, limiter
@@ -7,6 +7,38 @@ class Settings(BaseSettings):
     OPENFOODFACTS_APP_KEY: Optional[str] = None
     
     DATABASE_URL: str = "sqlite+aiosqlite:///./fitness.db"
+    DATABASE_POOL_SIZE: int = 4
+    
+    # Сколько хранится незавершенный диалог (состояние FSM), сек
+    FSM_STATE_TTL: int = 24 * 60 * 60
+    
+    # Поиск продуктов: бюджет времени на OpenFoodFacts (сек) и гонка
+    # локального каталога с внешним API
+    FOOD_SEARCH_TIMEOUT: float = 3.0
+    FOOD_SEARCH_RACE: bool = True
+    
+    # Период пересчета норм воды по погоде, сек (0 - отключено)
+    WATER_GOAL_REFRESH_INTERVAL: int = 3 * 60 * 60
+    
+    # Отрисовка графиков: число процессов и предел графиков в очереди
+    CHART_WORKERS: int = 2
+    CHART_MAX_PENDING: int = 8
+    
+    # Получение обновлений: "polling" или "webhook"
+    BOT_MODE: str = "polling"
+    WEBHOOK_URL: Optional[str] = None      # публичный адрес, например https://bot.example.com
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: Optional[str] = None   # X-Telegram-Bot-Api-Secret-Token, обязателен для webhook
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    # Сколько обновлений обрабатывается одновременно, остальные ждут
+    MAX_CONCURRENT_UPDATES: int = 100
+    # Отбрасывать ли накопившиеся обновления при запуске
+    DROP_PENDING_UPDATES: bool = False
+    # Процессов обработки обновлений (1 - все в основном процессе)
+    WORKERS: int = 1
+    # Период записи счетчиков (предохранители, кэши) в журнал, сек (0 - отключено)
+    STATS_LOG_INTERVAL: int = 5 * 60
     
     class Config:
         env_file = ".env"
@@ -1,74 +1,22 @@
 # database/__init__.py
 import sqlite3
-from pathlib import Path
+
+from database.connection import DB_PATH, connect
+from database.migrations import migrate, get_schema_version
 
 def init_db():
-    """Синхронная инициализация базы данных"""
-    db_path = Path("./fitness.db")
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Создаем таблицу users
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER UNIQUE NOT NULL,
-        username TEXT,
-        weight REAL,
-        height REAL,
-        age INTEGER,
-        gender TEXT DEFAULT 'male',
-        activity_level TEXT DEFAULT 'moderate',
-        city TEXT,
-        calorie_goal REAL DEFAULT 2000,
-        water_goal REAL DEFAULT 2000,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Создаем таблицу water_logs
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS water_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        amount REAL,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Создаем таблицу food_logs
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS food_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        food_name TEXT,
-        calories REAL,
-        protein REAL,
-        carbs REAL,
-        fat REAL,
-        serving_size REAL,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    # Создаем таблицу workout_logs
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS workout_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        workout_type TEXT,
-        duration INTEGER,
-        calories_burned REAL,
-        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
-    print("✅ База данных синхронно инициализирована")
+    """Синхронная инициализация базы данных: применение миграций"""
+    conn = connect(DB_PATH)
+    try:
+        applied = migrate(conn)
+        version = get_schema_version(conn)
+    finally:
+        conn.close()
+
+    if applied:
+        print(f"✅ Применены миграции: {', '.join(map(str, applied))}")
+    print(f"✅ База данных инициализирована (версия схемы {version})")
 
-def get_db_connection():
+def get_db_connection() -> sqlite3.Connection:
     """Получение синхронного соединения с БД"""
-    return sqlite3.connect("./fitness.db", check_same_thread=False)
\ No newline at end of file
+    return connect(DB_PATH)
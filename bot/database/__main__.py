@@ -0,0 +1,88 @@
+# database/__main__.py
+"""Служебные команды базы данных.
+
+    cd bot
+    python -m database migrate
+    python -m database rebuild-totals [--user USER_ID]
+    python -m database verify-totals [--user USER_ID]
+    python -m database import-catalog PATH [--restart]
+"""
+import argparse
+import logging
+
+from database import init_db, get_db_connection
+from database.catalog import import_catalog
+from database.rollup import rebuild_daily_totals, find_mismatched_totals
+
+def cmd_migrate(args):
+    init_db()
+
+def cmd_rebuild_totals(args):
+    init_db()
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rebuild_daily_totals(conn, args.user)
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM daily_totals").fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"✅ Дневные итоги пересчитаны, строк: {count}")
+
+def cmd_verify_totals(args):
+    init_db()
+    conn = get_db_connection()
+    try:
+        mismatched = find_mismatched_totals(conn, args.user)
+    finally:
+        conn.close()
+
+    for user_id, day, stored, expected in mismatched:
+        print(f"❌ {user_id} {day}: в итогах {stored}, по журналам {expected}")
+
+    if mismatched:
+        print(f"Расхождений: {len(mismatched)}. Исправить: python -m database rebuild-totals")
+        raise SystemExit(1)
+    print("✅ Дневные итоги совпадают с журналами")
+
+def cmd_import_catalog(args):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    init_db()
+    conn = get_db_connection()
+    try:
+        added = import_catalog(conn, args.path, args.batch_size, args.restart)
+        total = conn.execute("SELECT COUNT(*) FROM food_catalog").fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"✅ Импортировано продуктов: {added}, всего в каталоге: {total}")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="применить миграции схемы")
+
+    rebuild = commands.add_parser("rebuild-totals", help="пересчитать daily_totals из журналов")
+    rebuild.add_argument("--user", type=int, help="пересчитать только этого пользователя")
+
+    verify = commands.add_parser("verify-totals", help="сверить daily_totals с журналами")
+    verify.add_argument("--user", type=int, help="сверить только этого пользователя")
+
+    catalog = commands.add_parser("import-catalog", help="импортировать выгрузку OpenFoodFacts (CSV/JSONL)")
+    catalog.add_argument("path", help="файл .csv, .jsonl или их .gz")
+    catalog.add_argument("--batch-size", type=int, default=1000, help="продуктов в одной транзакции")
+    catalog.add_argument("--restart", action="store_true", help="начать импорт файла заново")
+
+    args = parser.parse_args()
+    handlers = {
+        "migrate": cmd_migrate,
+        "rebuild-totals": cmd_rebuild_totals,
+        "verify-totals": cmd_verify_totals,
+        "import-catalog": cmd_import_catalog,
+    }
+    handlers[args.command](args)
+
+if __name__ == "__main__":
+    main()
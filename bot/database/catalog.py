@@ -0,0 +1,276 @@
+# database/catalog.py
+"""Локальный каталог продуктов с полнотекстовым поиском (SQLite FTS5).
+
+Каталог наполняется из выгрузки OpenFoodFacts (CSV или JSONL, в том числе .gz):
+
+    python -m database import-catalog products.jsonl.gz
+
+Файл читается потоково пачками, позиция сохраняется в той же транзакции,
+что и пачка, поэтому прерванный импорт продолжается с места остановки.
+"""
+import gzip
+import io
+import json
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+IMPORT_BATCH_SIZE = 1000
+SEARCH_LIMIT = 10
+
+# Нечеткий поиск: только одно слово разумной длины, кандидатов по триграммам
+# проверяем расстоянием редактирования
+FUZZY_MIN_LENGTH = 4
+FUZZY_MAX_LENGTH = 30
+FUZZY_CANDIDATES = 200
+
+# Поля названий по убыванию приоритета для показа пользователю
+_NAME_FIELDS = ("product_name_ru", "product_name", "generic_name_ru",
+                "product_name_en", "generic_name", "generic_name_en")
+
+_UPSERT_SQL = """
+    INSERT INTO food_catalog (code, name, search_names, calories, protein, carbs, fat)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (code) DO UPDATE SET
+        name = excluded.name,
+        search_names = excluded.search_names,
+        calories = excluded.calories,
+        protein = excluded.protein,
+        carbs = excluded.carbs,
+        fat = excluded.fat
+"""
+
+# Популярные продукты, доступные без импорта выгрузки
+SEED_PRODUCTS = (
+    ("local:banana", "Банан", "банан banana", 89, 1.1, 23, 0.3),
+    ("local:apple", "Яблоко", "яблоко apple", 52, 0.3, 14, 0.2),
+    ("local:chicken-breast", "Куриная грудка", "куриная грудка chicken breast", 165, 31, 0, 3.6),
+    ("local:rice", "Рис вареный", "рис вареный rice boiled", 130, 2.7, 28, 0.3),
+    ("local:egg", "Яйцо куриное", "яйцо куриное egg", 155, 13, 1.1, 11),
+    ("local:oatmeal", "Овсянка", "овсянка овсяные хлопья oatmeal", 389, 16.9, 66, 6.9),
+)
+
+def seed_catalog(conn: sqlite3.Connection):
+    """Начальное наполнение каталога (шаг миграции, без коммита)"""
+    conn.executemany(_UPSERT_SQL, SEED_PRODUCTS)
+
+# --- Поиск ---
+
+def _product_from_row(row) -> Dict:
+    return {
+        "code": row[0],
+        "name": row[1],
+        "calories": row[2] or 0,
+        "protein": row[3] or 0,
+        "carbs": row[4] or 0,
+        "fat": row[5] or 0
+    }
+
+def _words(query: str) -> List[str]:
+    return re.findall(r"\w+", query.casefold().replace("ё", "е"))
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def search_catalog(conn: sqlite3.Connection, query: str, limit: int = SEARCH_LIMIT,
+                   fuzzy: bool = True) -> List[Dict]:
+    """Поиск в каталоге по префиксам слов, а если ничего нет и fuzzy -
+    одного слова с опечаткой"""
+    words = _words(query)
+    if not words:
+        return []
+
+    # "кур груд" находит "Куриная грудка"
+    prefix_query = " ".join(f"{_quote(word)}*" for word in words)
+    rows = conn.execute(
+        """SELECT c.code, c.name, c.calories, c.protein, c.carbs, c.fat
+           FROM food_catalog_fts
+           JOIN food_catalog c ON c.rowid = food_catalog_fts.rowid
+           WHERE food_catalog_fts MATCH ?
+           ORDER BY rank
+           LIMIT ?""",
+        (prefix_query, limit)
+    ).fetchall()
+
+    if not rows and fuzzy and len(words) == 1 and FUZZY_MIN_LENGTH <= len(words[0]) <= FUZZY_MAX_LENGTH:
+        rows = _search_fuzzy(conn, words[0], limit)
+
+    return [_product_from_row(row) for row in rows]
+
+def _max_typos(word: str) -> int:
+    # "яблако" -> "Яблоко", но "молоко" (две замены) уже не "Яблоко"
+    return 1 if len(word) < 10 else 2
+
+def _typo_distance(a: str, b: str) -> int:
+    """Расстояние Дамерау-Левенштейна (перестановка соседних букв - одна опечатка)"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+def _search_fuzzy(conn: sqlite3.Connection, word: str, limit: int) -> List[tuple]:
+    """Поиск слова с опечаткой: общие триграммы отбирают кандидатов,
+    а принимаются только названия со словом на расстоянии не больше _max_typos"""
+    trigrams = sorted({word[i:i + 3] for i in range(len(word) - 2)})
+    candidates = conn.execute(
+        """SELECT c.code, c.name, c.calories, c.protein, c.carbs, c.fat, c.search_names
+           FROM food_catalog_trigram
+           JOIN food_catalog c ON c.rowid = food_catalog_trigram.rowid
+           WHERE food_catalog_trigram MATCH ?
+           ORDER BY rank
+           LIMIT ?""",
+        (" OR ".join(_quote(t) for t in trigrams), FUZZY_CANDIDATES)
+    ).fetchall()
+
+    max_typos = _max_typos(word)
+    matches = []
+    for order, row in enumerate(candidates):
+        # Слово запроса может быть началом слова названия: "грутк" -> "грудка"
+        distance = min(
+            min(_typo_distance(word, name_word), _typo_distance(word, name_word[:len(word)]))
+            for name_word in _words(row[6])
+        )
+        if distance <= max_typos:
+            matches.append((distance, order, row[:6]))
+
+    matches.sort()
+    return [row for _, _, row in matches[:limit]]
+
+def get_products(conn: sqlite3.Connection, codes: List[str]) -> Dict[str, Dict]:
+    """Продукты каталога по кодам: код -> продукт"""
+    if not codes:
+        return {}
+    placeholders = ", ".join("?" * len(codes))
+    rows = conn.execute(
+        f"""SELECT code, name, calories, protein, carbs, fat
+            FROM food_catalog WHERE code IN ({placeholders})""",
+        tuple(codes)
+    ).fetchall()
+    return {row[0]: _product_from_row(row) for row in rows}
+
+# --- Импорт выгрузки OpenFoodFacts ---
+
+def _open_text(path: Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def _catalog_row(product: Dict) -> Optional[tuple]:
+    code = (product.get("code") or "").strip()
+    names = []
+    for field in _NAME_FIELDS:
+        value = product.get(field)
+        if isinstance(value, str) and value.strip() and value.strip() not in names:
+            names.append(value.strip())
+
+    nutriments = product.get("nutriments") or product
+    calories = _number(nutriments.get("energy-kcal_100g"))
+    if not code or not names or calories is None:
+        return None
+
+    return (
+        code,
+        names[0],
+        " ".join(names),
+        calories,
+        _number(nutriments.get("proteins_100g")),
+        _number(nutriments.get("carbohydrates_100g")),
+        _number(nutriments.get("fat_100g")),
+    )
+
+def _parse_lines(path: Path, lines: Iterator[str], header: Optional[List[str]]) -> Iterator[Optional[Dict]]:
+    """Разбор строк выгрузки; на каждую строку ровно один элемент (None - нечитаемая)"""
+    is_csv = ".csv" in path.suffixes
+    for line in lines:
+        try:
+            if is_csv:
+                values = line.rstrip("\r\n").split("\t")
+                yield dict(zip(header, values))
+            else:
+                yield json.loads(line)
+        except (ValueError, TypeError):
+            yield None
+
+def import_catalog(conn: sqlite3.Connection, path: str, batch_size: int = IMPORT_BATCH_SIZE,
+                   restart: bool = False) -> int:
+    """Потоковый импорт выгрузки OpenFoodFacts; возвращает число добавленных продуктов.
+
+    CSV-выгрузка OpenFoodFacts разделена табуляцией и не использует кавычки,
+    поэтому и в CSV, и в JSONL одна строка файла - один продукт.
+    """
+    source = Path(path)
+    source_key = str(source.resolve())
+
+    if restart:
+        conn.execute("DELETE FROM catalog_imports WHERE source = ?", (source_key,))
+        conn.commit()
+
+    state = conn.execute(
+        "SELECT position, imported, finished FROM catalog_imports WHERE source = ?",
+        (source_key,)
+    ).fetchone()
+    position, imported, finished = state or (0, 0, 0)
+    if finished:
+        logging.info(f"Выгрузка {source} уже импортирована")
+        return 0
+
+    added = 0
+    with _open_text(source) as stream:
+        header = None
+        if ".csv" in source.suffixes:
+            header = stream.readline().rstrip("\r\n").split("\t")
+
+        # Уже импортированные строки пропускаем без разбора
+        for _ in range(position):
+            if not stream.readline():
+                break
+
+        batch = []
+        for product in _parse_lines(source, stream, header):
+            position += 1
+            row = _catalog_row(product) if isinstance(product, dict) else None
+            if row:
+                batch.append(row)
+
+            if position % batch_size == 0:
+                added += _write_batch(conn, source_key, batch, position, imported + added, False)
+                batch = []
+                logging.info(f"Импорт каталога: обработано строк {position}, добавлено {imported + added}")
+
+        added += _write_batch(conn, source_key, batch, position, imported + added, True)
+
+    return added
+
+def _write_batch(conn: sqlite3.Connection, source: str, batch: List[tuple],
+                 position: int, imported: int, finished: bool) -> int:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(_UPSERT_SQL, batch)
+        conn.execute(
+            """INSERT INTO catalog_imports (source, position, imported, finished)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (source) DO UPDATE SET
+                   position = excluded.position,
+                   imported = excluded.imported,
+                   finished = excluded.finished,
+                   updated_at = CURRENT_TIMESTAMP""",
+            (source, position, imported + len(batch), int(finished))
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(batch)
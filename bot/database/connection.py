@@ -0,0 +1,56 @@
+# database/connection.py
+import sqlite3
+
+from config import settings
+
+# Сколько подготовленных выражений хранит каждое соединение
+STATEMENT_CACHE_SIZE = 256
+
+def sqlite_path_from_url(url: str) -> str:
+    """Путь к файлу БД из DATABASE_URL вида sqlite[+драйвер]:///путь"""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+
+    if not sep or dialect != "sqlite":
+        raise ValueError(
+            f"Неподдерживаемый DATABASE_URL: {url}. "
+            f"Ожидается sqlite:///путь или sqlite+aiosqlite:///путь"
+        )
+
+    # sqlite:///relative.db -> "relative.db", sqlite:////abs/path.db -> "/abs/path.db"
+    path = rest[1:] if rest.startswith("/") else rest
+    path = path.split("?", 1)[0]
+
+    # У каждого соединения пула была бы своя пустая база без таблиц
+    if not path or ":memory:" in path:
+        raise ValueError(
+            f"DATABASE_URL {url}: база в памяти не поддерживается, "
+            f"укажите файл, например sqlite:///./fitness.db"
+        )
+    return path
+
+DB_PATH = sqlite_path_from_url(settings.DATABASE_URL)
+
+# Настройки, применяемые к каждому соединению
+PRAGMAS = (
+    # Читатели не блокируются писателем
+    "PRAGMA journal_mode = WAL",
+    # В режиме WAL fsync при каждом коммите не нужен
+    "PRAGMA synchronous = NORMAL",
+    # Ждем освобождения блокировки вместо мгновенной ошибки
+    "PRAGMA busy_timeout = 5000",
+    # Кэш страниц ~20 МБ на соединение
+    "PRAGMA cache_size = -20000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """Создание соединения с БД с единообразными настройками"""
+    conn = sqlite3.connect(
+        db_path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
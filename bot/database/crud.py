@@ -1,21 +1,29 @@
 # database/crud.py
+import json
 import sqlite3
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Optional
+from dataclasses import fields
+from datetime import date
+from typing import Dict, List, Optional, Tuple
 
-def get_db_connection():
-    """Получение соединения с БД"""
-    return sqlite3.connect("fitness.db", check_same_thread=False)
+from database.catalog import get_products, search_catalog
+from database.pool import pool
+from database.records import (
+    UserProfile, WorkoutEntry, DaySummary, DailySnapshot,
+    columns, row_factory
+)
+from database.write_queue import write_queue
+from utils.cache import TTLCache
 
-def create_or_update_user(user_data: dict):
-    """Создание или обновление пользователя"""
-    conn = get_db_connection()
+# Профили меняются редко, а читаются почти в каждом обработчике
+user_cache = TTLCache(maxsize=10000, ttl=600)
+
+def _create_or_update_user(conn: sqlite3.Connection, user_data: dict):
     cursor = conn.cursor()
-    
+
     # Проверяем существование пользователя
     cursor.execute("SELECT id FROM users WHERE user_id = ?", (user_data["user_id"],))
     user_exists = cursor.fetchone()
-    
+
     if user_exists:
         # Обновляем существующего пользователя
         update_fields = []
@@ -24,7 +32,7 @@ def create_or_update_user(user_data: dict):
             if key != "user_id":
                 update_fields.append(f"{key} = ?")
                 values.append(value)
-        
+
         values.append(user_data["user_id"])
         query = f"UPDATE users SET {', '.join(update_fields)}, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?"
         cursor.execute(query, values)
@@ -33,161 +41,174 @@ def create_or_update_user(user_data: dict):
         columns = list(user_data.keys())
         placeholders = ["?"] * len(columns)
         values = list(user_data.values())
-        
+
         query = f"INSERT INTO users ({', '.join(columns)}, created_at, updated_at) VALUES ({', '.join(placeholders)}, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
         cursor.execute(query, values)
-    
+
     conn.commit()
-    conn.close()
 
-def get_user(user_id: int):
-    """Получение пользователя по ID"""
-    conn = get_db_connection()
+async def create_or_update_user(user_data: dict):
+    """Создание или обновление пользователя"""
+    try:
+        await pool.run(_create_or_update_user, user_data)
+    finally:
+        user_cache.invalidate(user_data["user_id"])
+
+_NOT_CACHED = object()
+
+_USER_COLUMNS = columns(UserProfile)
+_WORKOUT_COLUMNS = columns(WorkoutEntry)
+
+def _get_user(conn: sqlite3.Connection, user_id: int) -> Optional[UserProfile]:
     cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    
-    conn.close()
-    
-    if row:
-        return {
-            "id": row[0],
-            "user_id": row[1],
-            "username": row[2],
-            "weight": row[3],
-            "height": row[4],
-            "age": row[5],
-            "gender": row[6],
-            "activity_level": row[7],
-            "city": row[8],
-            "calorie_goal": row[9],
-            "water_goal": row[10],
-            "created_at": row[11],
-            "updated_at": row[12]
-        }
-    return None
+    cursor.row_factory = row_factory(UserProfile)
+    cursor.execute(f"SELECT {_USER_COLUMNS} FROM users WHERE user_id = ?", (user_id,))
+    return cursor.fetchone()
+
+async def get_user(user_id: int) -> Optional[UserProfile]:
+    """Получение пользователя по ID (через кэш профилей)"""
+    user = user_cache.get(user_id, _NOT_CACHED)
+    if user is not _NOT_CACHED:
+        return user
+
+    version = user_cache.version
+    user = await pool.run(_get_user, user_id)
+    user_cache.set(user_id, user, version=version)
+    return user
+
+def get_user_cache_stats() -> dict:
+    """Счетчики попаданий, промахов и вытеснений кэша профилей"""
+    return user_cache.stats()
 
-def add_water_log(user_id: int, amount: float):
+def _upsert_daily_totals(table: str, **totals) -> tuple:
+    """Выражение, прибавляющее значения к дневным итогам дня только что вставленной записи"""
+    columns = ", ".join(totals)
+    placeholders = ", ".join("?" * len(totals))
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in totals)
+    query = f"""INSERT INTO daily_totals (user_id, day, {columns})
+                VALUES (?, (SELECT DATE(timestamp) FROM {table} WHERE id = last_insert_rowid()), {placeholders})
+                ON CONFLICT (user_id, day) DO UPDATE SET {updates}"""
+    return query, tuple(totals.values())
+
+async def add_water_log(user_id: int, amount: float):
     """Добавление записи о выпитой воде"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "INSERT INTO water_logs (user_id, amount) VALUES (?, ?)",
-        (user_id, amount)
-    )
-    
-    conn.commit()
-    conn.close()
+    totals_query, totals = _upsert_daily_totals("water_logs", water_ml=amount)
+    await write_queue.submit([
+        ("INSERT INTO water_logs (user_id, amount) VALUES (?, ?)", (user_id, amount)),
+        (totals_query, (user_id, *totals)),
+    ])
 
-def add_food_log(user_id: int, food_name: str, calories: float, serving_size: float):
+async def add_food_log(user_id: int, food_name: str, calories: float, serving_size: float,
+                       protein: Optional[float] = None, carbs: Optional[float] = None,
+                       fat: Optional[float] = None):
     """Добавление записи о еде"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """INSERT INTO food_logs (user_id, food_name, calories, serving_size) 
-           VALUES (?, ?, ?, ?)""",
-        (user_id, food_name, calories, serving_size)
+    totals_query, totals = _upsert_daily_totals(
+        "food_logs", kcal_in=calories,
+        protein=protein or 0, carbs=carbs or 0, fat=fat or 0
     )
-    
-    conn.commit()
-    conn.close()
+    await write_queue.submit([
+        ("""INSERT INTO food_logs (user_id, food_name, calories, protein, carbs, fat, serving_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+         (user_id, food_name, calories, protein, carbs, fat, serving_size)),
+        (totals_query, (user_id, *totals)),
+    ])
 
-def add_workout_log(user_id: int, workout_type: str, duration: int, calories_burned: float):
+async def add_workout_log(user_id: int, workout_type: str, duration: int, calories_burned: float):
     """Добавление записи о тренировке"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """INSERT INTO workout_logs (user_id, workout_type, duration, calories_burned) 
-           VALUES (?, ?, ?, ?)""",
-        (user_id, workout_type, duration, calories_burned)
+    totals_query, totals = _upsert_daily_totals(
+        "workout_logs", kcal_burned=calories_burned, workouts=1
     )
-    
-    conn.commit()
-    conn.close()
+    await write_queue.submit([
+        ("""INSERT INTO workout_logs (user_id, workout_type, duration, calories_burned)
+            VALUES (?, ?, ?, ?)""",
+         (user_id, workout_type, duration, calories_burned)),
+        (totals_query, (user_id, *totals)),
+    ])
 
-def get_water_today(user_id: int) -> float:
-    """Получение выпитой воды за сегодня"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT COALESCE(SUM(amount), 0) 
-           FROM water_logs 
-           WHERE user_id = ? AND DATE(timestamp) = DATE('now')""",
+def _get_today_total(conn: sqlite3.Connection, column: str, user_id: int) -> float:
+    row = conn.execute(
+        f"SELECT {column} FROM daily_totals WHERE user_id = ? AND day = DATE('now')",
         (user_id,)
-    )
-    
-    total = cursor.fetchone()[0]
-    conn.close()
-    return float(total)
+    ).fetchone()
+    return float(row[0]) if row else 0.0
 
-def get_calories_today(user_id: int) -> float:
+async def get_water_today(user_id: int) -> float:
+    """Получение выпитой воды за сегодня"""
+    return await pool.run(_get_today_total, "water_ml", user_id)
+
+async def get_calories_today(user_id: int) -> float:
     """Получение потребленных калорий за сегодня"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        """SELECT COALESCE(SUM(calories), 0) 
-           FROM food_logs 
-           WHERE user_id = ? AND DATE(timestamp) = DATE('now')""",
-        (user_id,)
-    )
-    
-    total = cursor.fetchone()[0]
-    conn.close()
-    return float(total)
+    return await pool.run(_get_today_total, "kcal_in", user_id)
 
-def get_burned_calories_today(user_id: int) -> float:
+async def get_burned_calories_today(user_id: int) -> float:
     """Получение сожженных калорий за сегодня"""
-    conn = get_db_connection()
+    return await pool.run(_get_today_total, "kcal_burned", user_id)
+
+def _get_last_workout(conn: sqlite3.Connection, user_id: int) -> Optional[WorkoutEntry]:
     cursor = conn.cursor()
-    
+    cursor.row_factory = row_factory(WorkoutEntry)
     cursor.execute(
-        """SELECT COALESCE(SUM(calories_burned), 0) 
-           FROM workout_logs 
-           WHERE user_id = ? AND DATE(timestamp) = DATE('now')""",
+        f"""SELECT {_WORKOUT_COLUMNS} FROM workout_logs
+            WHERE user_id = ?
+            ORDER BY timestamp DESC LIMIT 1""",
         (user_id,)
     )
-    
-    total = cursor.fetchone()[0]
-    conn.close()
-    return float(total)
+    return cursor.fetchone()
 
-def get_last_workout(user_id: int):
+async def get_last_workout(user_id: int) -> Optional[WorkoutEntry]:
     """Получение последней тренировки"""
-    conn = get_db_connection()
+    return await pool.run(_get_last_workout, user_id)
+
+def _snapshot_from_row(cursor: sqlite3.Cursor, row: tuple) -> DailySnapshot:
+    user_end = len(fields(UserProfile))
+    totals_end = user_end + 6
+    workout = row[totals_end:]
+    return DailySnapshot(
+        UserProfile(*row[:user_end]),
+        *map(float, row[user_end:totals_end]),
+        WorkoutEntry(*workout) if workout[0] is not None else None
+    )
+
+def _get_daily_snapshot(conn: sqlite3.Connection, user_id: int) -> Optional[DailySnapshot]:
     cursor = conn.cursor()
-    
+    cursor.row_factory = _snapshot_from_row
     cursor.execute(
-        """SELECT * FROM workout_logs 
-           WHERE user_id = ? 
-           ORDER BY timestamp DESC LIMIT 1""",
+        f"""SELECT
+               {columns(UserProfile, "u.")},
+               COALESCE(d.water_ml, 0), COALESCE(d.kcal_in, 0), COALESCE(d.kcal_burned, 0),
+               COALESCE(d.protein, 0), COALESCE(d.carbs, 0), COALESCE(d.fat, 0),
+               {columns(WorkoutEntry, "w.")}
+           FROM users u
+           LEFT JOIN daily_totals d ON d.user_id = u.user_id AND d.day = DATE('now')
+           LEFT JOIN workout_logs w ON w.id = (
+               SELECT id FROM workout_logs
+               WHERE user_id = u.user_id
+               ORDER BY timestamp DESC LIMIT 1
+           )
+           WHERE u.user_id = ?""",
         (user_id,)
     )
-    
-    row = cursor.fetchone()
-    conn.close()
-    
-    if row:
-        return {
-            "id": row[0],
-            "user_id": row[1],
-            "workout_type": row[2],
-            "duration": row[3],
-            "calories_burned": row[4],
-            "timestamp": row[5]
-        }
-    return None
+    return cursor.fetchone()
 
-def get_weekly_summary(user_id: int) -> List[Dict]:
-    """Получение недельной статистики - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
-    conn = get_db_connection()
+async def get_daily_snapshot(user_id: int) -> Optional[DailySnapshot]:
+    """Профиль, итоги за сегодня и последняя тренировка одним запросом"""
+    version = user_cache.version
+    snapshot = await pool.run(_get_daily_snapshot, user_id)
+    user_cache.set(user_id, snapshot.user if snapshot else None, version=version)
+    return snapshot
+
+def _day_summary_from_row(cursor: sqlite3.Cursor, row: tuple) -> DaySummary:
+    return DaySummary(
+        date=date.fromisoformat(row[0]),
+        water=float(row[1]),
+        calories=float(row[2]),
+        workouts=int(row[3])
+    )
+
+def _get_weekly_summary(conn: sqlite3.Connection, user_id: int) -> List[DaySummary]:
     cursor = conn.cursor()
-    
+    cursor.row_factory = _day_summary_from_row
+
     # Создаем временную таблицу с датами последних 7 дней
     cursor.execute("""
         WITH RECURSIVE dates(date) AS (
@@ -197,33 +218,160 @@ def get_weekly_summary(user_id: int) -> List[Dict]:
             FROM dates
             WHERE date < DATE('now')
         )
-        SELECT 
+        SELECT
             dates.date as date,
-            COALESCE(SUM(w.amount), 0) as water,
-            COALESCE(SUM(f.calories), 0) as calories,
-            COUNT(DISTINCT wo.id) as workouts
+            COALESCE(d.water_ml, 0) as water,
+            COALESCE(d.kcal_in, 0) as calories,
+            COALESCE(d.workouts, 0) as workouts
         FROM dates
-        LEFT JOIN water_logs w ON DATE(w.timestamp) = dates.date AND w.user_id = ?
-        LEFT JOIN food_logs f ON DATE(f.timestamp) = dates.date AND f.user_id = ?
-        LEFT JOIN workout_logs wo ON DATE(wo.timestamp) = dates.date AND wo.user_id = ?
-        GROUP BY dates.date
+        LEFT JOIN daily_totals d ON d.user_id = ? AND d.day = dates.date
         ORDER BY dates.date
-    """, (user_id, user_id, user_id))
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    summary = []
-    for row in rows:
-        summary.append({
-            "date": datetime.strptime(row[0], "%Y-%m-%d").date() if row[0] else None,
-            "water": float(row[1]) if row[1] else 0.0,
-            "calories": float(row[2]) if row[2] else 0.0,
-            "workouts": row[3] or 0
-        })
-    
-    return summary
-
-def get_today_calories(user_id: int) -> float:
+    """, (user_id,))
+
+    return cursor.fetchall()
+
+async def get_weekly_summary(user_id: int) -> List[DaySummary]:
+    """Получение недельной статистики - ИСПРАВЛЕННАЯ ВЕРСИЯ"""
+    return await pool.run(_get_weekly_summary, user_id)
+
+def _get_user_cities(conn: sqlite3.Connection) -> List[str]:
+    rows = conn.execute(
+        "SELECT DISTINCT city FROM users WHERE city IS NOT NULL AND city != ''"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+async def get_user_cities() -> List[str]:
+    """Все различные города пользователей"""
+    return await pool.run(_get_user_cities)
+
+def _get_users_batch(conn: sqlite3.Connection, after_user_id: int, limit: int) -> List[tuple]:
+    return conn.execute(
+        """SELECT user_id, weight, activity_level, city, water_goal
+           FROM users
+           WHERE user_id > ? AND city IS NOT NULL AND weight IS NOT NULL
+           ORDER BY user_id
+           LIMIT ?""",
+        (after_user_id, limit)
+    ).fetchall()
+
+async def get_users_batch(after_user_id: int, limit: int) -> List[tuple]:
+    """Пачка пользователей с городом и весом: (user_id, weight, activity_level, city, water_goal)"""
+    return await pool.run(_get_users_batch, after_user_id, limit)
+
+def _update_water_goals(conn: sqlite3.Connection, goals: List[tuple]) -> int:
+    conn.execute("BEGIN IMMEDIATE")
+    # Профиль, сохраненный после чтения пачки, не перезаписывается нормой по старым данным
+    cursor = conn.executemany(
+        """UPDATE users SET water_goal = ?, updated_at = CURRENT_TIMESTAMP
+           WHERE user_id = ? AND weight IS ? AND activity_level IS ? AND city IS ?
+             AND water_goal IS ?""",
+        goals
+    )
+    conn.commit()
+    return cursor.rowcount
+
+async def update_water_goals(goals: List[tuple]) -> int:
+    """Пакетное обновление норм воды одной транзакцией; возвращает число обновленных.
+
+    goals: [(water_goal, user_id, weight, activity_level, city, old_water_goal), ...] -
+    пользователь обновляется, только если его профиль не менялся после чтения.
+    """
+    if not goals:
+        return 0
+    try:
+        return await pool.run(_update_water_goals, goals)
+    finally:
+        for _, user_id, *_ in goals:
+            user_cache.invalidate(user_id)
+
+def _get_cached_food_search(conn: sqlite3.Connection, query: str):
+    row = conn.execute(
+        "SELECT products, fetched_at FROM food_search_cache WHERE query = ?",
+        (query,)
+    ).fetchone()
+    if row:
+        return json.loads(row[0]), row[1]
+    return None
+
+async def get_cached_food_search(query: str) -> Optional[Tuple[List[dict], float]]:
+    """Сохраненные результаты поиска продуктов: (продукты, время получения)"""
+    return await pool.run(_get_cached_food_search, query)
+
+def _save_food_search(conn: sqlite3.Connection, query: str, products: str, fetched_at: float):
+    conn.execute(
+        """INSERT INTO food_search_cache (query, products, fetched_at)
+           VALUES (?, ?, ?)
+           ON CONFLICT (query) DO UPDATE SET
+               products = excluded.products,
+               fetched_at = excluded.fetched_at""",
+        (query, products, fetched_at)
+    )
+    conn.commit()
+
+async def save_food_search(query: str, products: List[dict], fetched_at: float):
+    """Сохранение результатов поиска продуктов"""
+    payload = json.dumps(products, ensure_ascii=False)
+    await pool.run(_save_food_search, query, payload, fetched_at)
+
+def _evict_food_search_cache(conn: sqlite3.Connection, max_entries: int) -> int:
+    cursor = conn.execute(
+        """DELETE FROM food_search_cache WHERE fetched_at < (
+               SELECT fetched_at FROM food_search_cache
+               ORDER BY fetched_at DESC LIMIT 1 OFFSET ?
+           )""",
+        (max_entries - 1,)
+    )
+    conn.commit()
+    return cursor.rowcount
+
+async def evict_food_search_cache(max_entries: int) -> int:
+    """Удаление самых старых результатов поиска сверх max_entries"""
+    return await pool.run(_evict_food_search_cache, max_entries)
+
+async def search_food_catalog(query: str, limit: int = 10, fuzzy: bool = True) -> List[dict]:
+    """Поиск продуктов в локальном каталоге (fuzzy - с учетом опечаток)"""
+    return await pool.run(search_catalog, query, limit, fuzzy)
+
+async def get_catalog_products(codes: List[str]) -> Dict[str, dict]:
+    """Продукты каталога по кодам: код -> продукт"""
+    return await pool.run(get_products, codes)
+
+def _get_cached_products(conn: sqlite3.Connection, codes: List[str]) -> Dict[str, dict]:
+    placeholders = ", ".join("?" * len(codes))
+    rows = conn.execute(
+        f"SELECT code, product FROM food_product_cache WHERE code IN ({placeholders})",
+        tuple(codes)
+    ).fetchall()
+    return {code: json.loads(product) for code, product in rows}
+
+async def get_cached_products(codes: List[str]) -> Dict[str, dict]:
+    """Продукты, показанные в результатах поиска, по кодам: код -> продукт"""
+    if not codes:
+        return {}
+    return await pool.run(_get_cached_products, codes)
+
+async def save_cached_products(products: List[dict], cached_at: float):
+    """Сохранение показанных продуктов в кэш продуктов"""
+    if products:
+        await write_queue.submit([
+            ("""INSERT INTO food_product_cache (code, product, cached_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (code) DO UPDATE SET
+                    product = excluded.product,
+                    cached_at = excluded.cached_at""",
+             (product["code"], json.dumps(product, ensure_ascii=False), cached_at))
+            for product in products
+        ])
+
+def _evict_cached_products(conn: sqlite3.Connection, cached_before: float) -> int:
+    cursor = conn.execute("DELETE FROM food_product_cache WHERE cached_at < ?", (cached_before,))
+    conn.commit()
+    return cursor.rowcount
+
+async def evict_cached_products(cached_before: float) -> int:
+    """Удаление продуктов, показанных раньше cached_before"""
+    return await pool.run(_evict_cached_products, cached_before)
+
+async def get_today_calories(user_id: int) -> float:
     """Получение потребленных калорий за сегодня"""
-    return get_calories_today(user_id)
\ No newline at end of file
+    return await get_calories_today(user_id)
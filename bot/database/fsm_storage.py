@@ -0,0 +1,159 @@
+# database/fsm_storage.py
+"""Хранилище состояний FSM aiogram в базе бота (таблица fsm_storage).
+
+Незавершенные диалоги (/set_profile, /log_food, /log_workout) переживают
+перезапуск и доступны всем процессам, работающим с той же базой.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from config import settings
+from database.pool import ConnectionPool, pool
+
+STATE_TTL = settings.FSM_STATE_TTL   # сколько хранится заброшенный диалог, сек
+FLUSH_DELAY = 0.05                   # сколько копим изменения перед записью, сек
+CLEANUP_INTERVAL = 600               # как часто удаляем истекшие записи, сек
+
+# (ключ, состояние, данные JSON, истекает)
+Entry = Tuple[str, Optional[str], str, float]
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище на SQLite с отложенной записью.
+
+    Изменения одного обработчика (update_data, затем set_state и т.д.)
+    копятся в памяти FLUSH_DELAY и записываются одной транзакцией;
+    до записи чтения видят их из памяти. Записи без активности дольше
+    STATE_TTL считаются истекшими.
+    """
+
+    def __init__(self, db_pool: ConnectionPool = pool, ttl: float = STATE_TTL,
+                 flush_delay: float = FLUSH_DELAY, key_builder: Optional[KeyBuilder] = None):
+        self._pool = db_pool
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        # Незаписанные изменения: ключ -> (состояние, данные)
+        self._dirty: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+        # Изменения, которые записываются прямо сейчас
+        self._flushing: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Записи идут строго по очереди: иначе более поздняя запись могла
+        # закоммититься раньше и быть затерта более ранней
+        self._flush_lock = asyncio.Lock()
+        self._last_cleanup = time.monotonic()
+
+    async def _load(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        storage_key = self.key_builder.build(key)
+        for pending in (self._dirty, self._flushing):
+            if storage_key in pending:
+                return pending[storage_key]
+        return await self._pool.run(_load_entry, storage_key, time.time())
+
+    def _store(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        self._dirty[self.key_builder.build(key)] = (state, data)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        _, data = await self._load(key)
+        self._store(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        state, _ = await self._load(key)
+        self._store(key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(key)
+        return data.copy()
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_delay)
+        finally:
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            # Ошибка уже записана в лог, изменения попадут в следующую запись
+            pass
+
+    async def flush(self):
+        """Запись накопленных изменений одной транзакцией"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            self._flushing = dirty
+
+            cleanup = time.monotonic() - self._last_cleanup > CLEANUP_INTERVAL
+            if cleanup:
+                self._last_cleanup = time.monotonic()
+
+            try:
+                expires_at = time.time() + self.ttl
+                entries = [
+                    (key, state, json.dumps(data, ensure_ascii=False), expires_at)
+                    for key, (state, data) in dirty.items()
+                ]
+                await self._pool.run(_save_entries, entries, cleanup)
+            except Exception as e:
+                # Возвращаем изменения, если их не перезаписали новые
+                for key, value in dirty.items():
+                    self._dirty.setdefault(key, value)
+                logging.error(f"Ошибка записи состояний FSM: {e}")
+                raise
+            finally:
+                self._flushing = {}
+
+    async def close(self) -> None:
+        """Запись оставшихся изменений (при остановке бота)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+
+def _load_entry(conn: sqlite3.Connection, key: str, now: float) -> Tuple[Optional[str], Dict[str, Any]]:
+    row = conn.execute(
+        "SELECT state, data FROM fsm_storage WHERE key = ? AND expires_at > ?",
+        (key, now)
+    ).fetchone()
+    if row is None:
+        return None, {}
+    return row[0], json.loads(row[1])
+
+def _save_entries(conn: sqlite3.Connection, entries: List[Entry], cleanup: bool):
+    conn.execute("BEGIN IMMEDIATE")
+    # Пустые записи (диалог завершен через state.clear()) удаляются
+    conn.executemany(
+        "DELETE FROM fsm_storage WHERE key = ?",
+        [(key,) for key, state, data, _ in entries if state is None and data == "{}"]
+    )
+    conn.executemany(
+        """INSERT INTO fsm_storage (key, state, data, expires_at)
+           VALUES (?, ?, ?, ?)
+           ON CONFLICT (key) DO UPDATE SET
+               state = excluded.state,
+               data = excluded.data,
+               expires_at = excluded.expires_at""",
+        [entry for entry in entries if not (entry[1] is None and entry[2] == "{}")]
+    )
+    if cleanup:
+        conn.execute("DELETE FROM fsm_storage WHERE expires_at <= ?", (time.time(),))
+    conn.commit()
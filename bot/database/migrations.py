@@ -0,0 +1,229 @@
+# database/migrations.py
+import logging
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+from database.catalog import seed_catalog
+from database.rollup import rebuild_daily_totals
+
+# Шаг миграции - SQL-выражение или функция, принимающая соединение
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+# Миграции применяются строго по возрастанию версии.
+# Уже выпущенные миграции не меняются - только добавляются новые.
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "Базовые таблицы", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            weight REAL,
+            height REAL,
+            age INTEGER,
+            gender TEXT DEFAULT 'male',
+            activity_level TEXT DEFAULT 'moderate',
+            city TEXT,
+            calorie_goal REAL DEFAULT 2000,
+            water_goal REAL DEFAULT 2000,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS water_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            amount REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS food_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            food_name TEXT,
+            calories REAL,
+            protein REAL,
+            carbs REAL,
+            fat REAL,
+            serving_size REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS workout_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            workout_type TEXT,
+            duration INTEGER,
+            calories_burned REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (2, "Индексы (user_id, timestamp) для журналов", [
+        "CREATE INDEX IF NOT EXISTS idx_water_logs_user_timestamp ON water_logs (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_food_logs_user_timestamp ON food_logs (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_workout_logs_user_timestamp ON workout_logs (user_id, timestamp)",
+    ]),
+    (3, "Дневные итоги daily_totals", [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            water_ml REAL NOT NULL DEFAULT 0,
+            kcal_in REAL NOT NULL DEFAULT 0,
+            kcal_burned REAL NOT NULL DEFAULT 0,
+            protein REAL NOT NULL DEFAULT 0,
+            carbs REAL NOT NULL DEFAULT 0,
+            fat REAL NOT NULL DEFAULT 0,
+            workouts INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+        ''',
+        # Заполняем итоги по уже накопленным журналам
+        rebuild_daily_totals,
+    ]),
+    (4, "Кэш поиска продуктов OpenFoodFacts", [
+        '''
+        CREATE TABLE IF NOT EXISTS food_search_cache (
+            query TEXT PRIMARY KEY,
+            products TEXT NOT NULL,
+            fetched_at REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_food_search_cache_fetched_at ON food_search_cache (fetched_at)",
+    ]),
+    (5, "Локальный каталог продуктов с FTS5", [
+        '''
+        CREATE TABLE IF NOT EXISTS food_catalog (
+            code TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            search_names TEXT NOT NULL,
+            calories REAL,
+            protein REAL,
+            carbs REAL,
+            fat REAL
+        )
+        ''',
+        # Поиск по префиксам слов (русские и английские названия)
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS food_catalog_fts USING fts5(
+            search_names,
+            content='food_catalog', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        # Нечеткий поиск по триграммам для запросов с опечатками
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS food_catalog_trigram USING fts5(
+            search_names,
+            content='food_catalog', content_rowid='rowid',
+            tokenize='trigram'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS food_catalog_ai AFTER INSERT ON food_catalog BEGIN
+            INSERT INTO food_catalog_fts (rowid, search_names) VALUES (new.rowid, new.search_names);
+            INSERT INTO food_catalog_trigram (rowid, search_names) VALUES (new.rowid, new.search_names);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS food_catalog_ad AFTER DELETE ON food_catalog BEGIN
+            INSERT INTO food_catalog_fts (food_catalog_fts, rowid, search_names)
+                VALUES ('delete', old.rowid, old.search_names);
+            INSERT INTO food_catalog_trigram (food_catalog_trigram, rowid, search_names)
+                VALUES ('delete', old.rowid, old.search_names);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS food_catalog_au AFTER UPDATE OF search_names ON food_catalog BEGIN
+            INSERT INTO food_catalog_fts (food_catalog_fts, rowid, search_names)
+                VALUES ('delete', old.rowid, old.search_names);
+            INSERT INTO food_catalog_trigram (food_catalog_trigram, rowid, search_names)
+                VALUES ('delete', old.rowid, old.search_names);
+            INSERT INTO food_catalog_fts (rowid, search_names) VALUES (new.rowid, new.search_names);
+            INSERT INTO food_catalog_trigram (rowid, search_names) VALUES (new.rowid, new.search_names);
+        END
+        ''',
+        # Позиция импорта каждой выгрузки для продолжения после сбоя
+        '''
+        CREATE TABLE IF NOT EXISTS catalog_imports (
+            source TEXT PRIMARY KEY,
+            position INTEGER NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            finished INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        seed_catalog,
+    ]),
+    (6, "Состояния FSM aiogram", [
+        '''
+        CREATE TABLE IF NOT EXISTS fsm_storage (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data TEXT NOT NULL DEFAULT '{}',
+            expires_at REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_fsm_storage_expires_at ON fsm_storage (expires_at)",
+    ]),
+    (7, "Кэш продуктов, показанных в /log_food", [
+        # Данные FSM ссылаются на продукты по коду; каталог остается за импортом
+        '''
+        CREATE TABLE IF NOT EXISTS food_product_cache (
+            code TEXT PRIMARY KEY,
+            product TEXT NOT NULL,
+            cached_at REAL NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_food_product_cache_cached_at ON food_product_cache (cached_at)",
+    ]),
+]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Текущая версия схемы (0 - миграции еще не применялись)"""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS schema_version (
+               version INTEGER PRIMARY KEY,
+               description TEXT,
+               applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )"""
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    """Применение недостающих миграций, возвращает список примененных версий"""
+    applied = []
+
+    for version, description, steps in MIGRATIONS:
+        # Каждая миграция - отдельная транзакция. BEGIN IMMEDIATE не дает
+        # двум процессам применить одну и ту же миграцию одновременно.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        logging.info(f"Применена миграция {version}: {description}")
+        applied.append(version)
+
+    return applied
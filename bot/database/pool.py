@@ -0,0 +1,88 @@
+# database/pool.py
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from config import settings
+from database.connection import DB_PATH, connect
+
+POOL_SIZE = settings.DATABASE_POOL_SIZE
+
+
+class ConnectionPool:
+    """Пул долгоживущих соединений SQLite.
+
+    Запросы выполняются в отдельных потоках, поэтому обработчики
+    не блокируют цикл событий на время работы с диском.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._connections: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = asyncio.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        return connect(self.db_path)
+
+    async def open(self):
+        """Открытие соединений (повторный вызов ничего не делает)"""
+        async with self._lock:
+            if self._connections is not None:
+                return
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.size, thread_name_prefix="db"
+            )
+            loop = asyncio.get_running_loop()
+            connections = asyncio.Queue()
+            for _ in range(self.size):
+                conn = await loop.run_in_executor(self._executor, self._connect)
+                connections.put_nowait(conn)
+            self._connections = connections
+
+    async def close(self):
+        """Закрытие всех соединений пула"""
+        async with self._lock:
+            if self._connections is None:
+                return
+
+            loop = asyncio.get_running_loop()
+            for _ in range(self.size):
+                conn = await self._connections.get()
+                await loop.run_in_executor(self._executor, conn.close)
+
+            self._executor.shutdown(wait=True)
+            self._connections = None
+            self._executor = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Выполнение func(conn, *args) на свободном соединении пула"""
+        if self._connections is None:
+            await self.open()
+
+        connections = self._connections
+        conn = await connections.get()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, partial(_call, func, conn, *args)
+        )
+        # Соединение возвращается в пул только после завершения запроса в потоке,
+        # даже если ожидающую корутину отменили раньше
+        future.add_done_callback(lambda _: connections.put_nowait(conn))
+        return await asyncio.shield(future)
+
+
+def _call(func: Callable[..., Any], conn: sqlite3.Connection, *args) -> Any:
+    """Вызов в потоке пула: незавершенная транзакция откатывается при ошибке"""
+    try:
+        return func(conn, *args)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+pool = ConnectionPool()
@@ -0,0 +1,71 @@
+# database/records.py
+"""Типизированные записи, которые возвращает слой данных.
+
+Поля перечислены явно и совпадают с колонками выборок, поэтому новая
+колонка в таблице не сдвигает значения, как это было с SELECT * и row[9].
+"""
+import sqlite3
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Callable, Optional, Type, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True, slots=True)
+class UserProfile:
+    id: int
+    user_id: int
+    username: Optional[str]
+    weight: Optional[float]
+    height: Optional[float]
+    age: Optional[int]
+    gender: Optional[str]
+    activity_level: Optional[str]
+    city: Optional[str]
+    calorie_goal: Optional[float]
+    water_goal: Optional[float]
+    created_at: Optional[str]
+    updated_at: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class WorkoutEntry:
+    id: int
+    user_id: int
+    workout_type: Optional[str]
+    duration: Optional[int]
+    calories_burned: Optional[float]
+    timestamp: str
+
+
+@dataclass(frozen=True, slots=True)
+class DaySummary:
+    date: date
+    water: float
+    calories: float
+    workouts: int
+
+
+@dataclass(frozen=True, slots=True)
+class DailySnapshot:
+    user: UserProfile
+    water_today: float
+    calories_today: float
+    burned_today: float
+    protein_today: float
+    carbs_today: float
+    fat_today: float
+    last_workout: Optional[WorkoutEntry]
+
+
+def columns(record: Type, prefix: str = "") -> str:
+    """Список колонок для SELECT в порядке полей записи"""
+    return ", ".join(f"{prefix}{field.name}" for field in fields(record))
+
+
+def row_factory(record: Type[T]) -> Callable[[sqlite3.Cursor, tuple], T]:
+    """row_factory для курсора, собирающая записи нужного типа"""
+    def factory(cursor: sqlite3.Cursor, row: tuple) -> T:
+        return record(*row)
+    return factory
@@ -0,0 +1,93 @@
+# database/rollup.py
+"""Дневные итоги пользователей (таблица daily_totals).
+
+Итоги обновляются при каждой записи в журнал, а этот модуль умеет
+пересобирать их из журналов целиком (см. python -m database rebuild-totals).
+"""
+import sqlite3
+from typing import List, Optional, Tuple
+
+# Каждый журнал агрегируется отдельно до одной строки на (пользователь, день),
+# и только потом агрегаты соединяются по дате. Соединение сырых журналов
+# давало бы декартово произведение записей за день и завышенные суммы.
+_AGGREGATES_SQL = """
+    WITH
+    water AS (
+        SELECT user_id, DATE(timestamp) AS day, SUM(amount) AS water_ml
+        FROM water_logs {where}
+        GROUP BY user_id, DATE(timestamp)
+    ),
+    food AS (
+        SELECT user_id, DATE(timestamp) AS day,
+               SUM(calories) AS kcal_in,
+               SUM(COALESCE(protein, 0)) AS protein,
+               SUM(COALESCE(carbs, 0)) AS carbs,
+               SUM(COALESCE(fat, 0)) AS fat
+        FROM food_logs {where}
+        GROUP BY user_id, DATE(timestamp)
+    ),
+    workouts AS (
+        SELECT user_id, DATE(timestamp) AS day,
+               SUM(calories_burned) AS kcal_burned, COUNT(*) AS workouts
+        FROM workout_logs {where}
+        GROUP BY user_id, DATE(timestamp)
+    ),
+    days AS (
+        SELECT user_id, day FROM water
+        UNION SELECT user_id, day FROM food
+        UNION SELECT user_id, day FROM workouts
+    )
+    SELECT
+        days.user_id, days.day,
+        COALESCE(water.water_ml, 0),
+        COALESCE(food.kcal_in, 0),
+        COALESCE(workouts.kcal_burned, 0),
+        COALESCE(food.protein, 0),
+        COALESCE(food.carbs, 0),
+        COALESCE(food.fat, 0),
+        COALESCE(workouts.workouts, 0)
+    FROM days
+    LEFT JOIN water USING (user_id, day)
+    LEFT JOIN food USING (user_id, day)
+    LEFT JOIN workouts USING (user_id, day)
+"""
+
+_COLUMNS = "user_id, day, water_ml, kcal_in, kcal_burned, protein, carbs, fat, workouts"
+
+def _aggregates(user_id: Optional[int]) -> Tuple[str, tuple]:
+    if user_id is None:
+        return _AGGREGATES_SQL.format(where=""), ()
+    return _AGGREGATES_SQL.format(where="WHERE user_id = ?"), (user_id,) * 3
+
+def rebuild_daily_totals(conn: sqlite3.Connection, user_id: Optional[int] = None):
+    """Пересчет daily_totals из журналов (без коммита - транзакцией управляет вызывающий)"""
+    query, params = _aggregates(user_id)
+
+    if user_id is None:
+        conn.execute("DELETE FROM daily_totals")
+    else:
+        conn.execute("DELETE FROM daily_totals WHERE user_id = ?", (user_id,))
+
+    conn.execute(f"INSERT INTO daily_totals ({_COLUMNS}) {query}", params)
+
+def find_mismatched_totals(conn: sqlite3.Connection, user_id: Optional[int] = None) -> List[tuple]:
+    """Дни, для которых daily_totals расходится с журналами: (user_id, day, итоги, журналы)"""
+    query, params = _aggregates(user_id)
+    expected = {row[:2]: row[2:] for row in conn.execute(query, params)}
+
+    if user_id is None:
+        stored_rows = conn.execute(f"SELECT {_COLUMNS} FROM daily_totals")
+    else:
+        stored_rows = conn.execute(
+            f"SELECT {_COLUMNS} FROM daily_totals WHERE user_id = ?", (user_id,)
+        )
+    stored = {row[:2]: row[2:] for row in stored_rows}
+
+    empty = (0, 0, 0, 0, 0, 0, 0)
+    mismatched = []
+    for key in sorted(expected.keys() | stored.keys()):
+        actual = stored.get(key, empty)
+        reference = expected.get(key, empty)
+        if any(abs(a - b) > 1e-6 for a, b in zip(actual, reference)):
+            mismatched.append((*key, actual, reference))
+    return mismatched
@@ -0,0 +1,134 @@
+# database/write_queue.py
+import asyncio
+import logging
+import sqlite3
+from typing import List, Optional, Sequence, Tuple
+
+from database.pool import ConnectionPool, pool
+
+# Одна запись в очереди - набор выражений, применяемых атомарно
+Statement = Tuple[str, Sequence]
+
+MAX_BATCH = 256       # записей в одной транзакции
+MAX_DELAY = 0.005     # сколько ждем попутчиков после первой записи, сек
+MAX_PENDING = 10000   # при заполнении очереди submit() ждет
+
+
+class WriteBehindQueue:
+    """Групповой коммит вставок в журналы.
+
+    Записи от разных пользователей копятся несколько миллисекунд и
+    фиксируются одной транзакцией. submit() возвращает управление только
+    после коммита, поэтому следующий запрос того же обработчика
+    уже видит свою запись.
+    """
+
+    def __init__(self, db_pool: ConnectionPool, max_batch: int = MAX_BATCH,
+                 max_delay: float = MAX_DELAY, max_pending: int = MAX_PENDING):
+        self._pool = db_pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, statements: List[Statement]):
+        """Постановка записи в очередь и ожидание ее коммита"""
+        if self._closing:
+            raise RuntimeError("Очередь записи остановлена")
+
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((statements, future))
+        await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            # Даем другим пользователям присоединиться к транзакции
+            if self._queue.qsize() < self.max_batch:
+                await asyncio.sleep(self.max_delay)
+
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._flush(batch)
+
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _flush(self, batch):
+        try:
+            errors = await self._pool.run(
+                _write_batch, [statements for statements, _ in batch]
+            )
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        for (_, future), error in zip(batch, errors):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
+
+    async def close(self):
+        """Запись всего накопленного и остановка очереди"""
+        self._closing = True
+        if self._task is None:
+            return
+
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+        self._closing = False
+
+
+def _execute(conn: sqlite3.Connection, statements: List[Statement]):
+    for query, params in statements:
+        conn.execute(query, params)
+
+
+def _write_batch(conn: sqlite3.Connection, batch: List[List[Statement]]) -> list:
+    """Запись пачки одной транзакцией; возвращает ошибку (или None) для каждой записи"""
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for statements in batch:
+            _execute(conn, statements)
+        conn.commit()
+        return [None] * len(batch)
+    except Exception:
+        # Не только ошибки SQLite: неверный параметр дает TypeError/OverflowError
+        conn.rollback()
+        if len(batch) == 1:
+            raise
+
+    # Ошибочная запись не должна отменять чужие - пишем по одной
+    logging.warning("Групповая запись не удалась, повтор по одной записи")
+    errors = []
+    for statements in batch:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            _execute(conn, statements)
+            conn.commit()
+            errors.append(None)
+        except Exception as e:
+            conn.rollback()
+            errors.append(e)
+    return errors
+
+
+write_queue = WriteBehindQueue(pool)
@@ -3,7 +3,8 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from services.nutrition import search_food
+from services.nutrition import search_food, remember_products, get_product
+from services.visualizations import invalidate_charts
 from database.crud import (
     add_food_log, get_user, get_today_calories
 )
@@ -29,10 +30,12 @@ async def process_food_search(message: Message, state: FSMContext):
         await message.answer("Продукт не найден. Попробуйте другое название.")
         return
     
-    await state.update_data(search_results=results)
+    # В состоянии храним только коды показанных продуктов, а не сами результаты
+    shown = results[:5]
+    await state.update_data(product_codes=remember_products(shown))
     
     keyboard = []
-    for i, product in enumerate(results[:5]):
+    for i, product in enumerate(shown):
         keyboard.append([
             InlineKeyboardButton(
                 text=f"{product['name']} ({product.get('calories', 0)} ккал/100г)",
@@ -49,12 +52,12 @@ async def process_food_search(message: Message, state: FSMContext):
 @router.callback_query(F.data.startswith("select_food_"))
 async def process_food_selection(callback_query, state: FSMContext):
     data = await state.get_data()
-    results = data.get("search_results", [])
+    codes = data.get("product_codes", [])
     idx = int(callback_query.data.split("_")[-1])
     
-    if idx < len(results):
-        selected_food = results[idx]
-        await state.update_data(selected_food=selected_food)
+    selected_food = await get_product(codes[idx]) if idx < len(codes) else None
+    if selected_food:
+        await state.update_data(selected_code=codes[idx])
         
         await callback_query.message.answer(
             f"Вы выбрали: {selected_food['name']}\n"
@@ -74,26 +77,34 @@ async def process_food_amount(message: Message, state: FSMContext):
             return
         
         data = await state.get_data()
-        selected_food = data.get("selected_food", {})
+        selected_food = await get_product(data.get("selected_code"))
+        if not selected_food:
+            await message.answer("Продукт не найден. Начните заново: /log_food")
+            await state.clear()
+            return
         
         calories_per_100g = selected_food.get("calories", 0)
         total_calories = (calories_per_100g * amount) / 100
         
-        add_food_log(
+        await add_food_log(
             user_id=message.from_user.id,
             food_name=selected_food["name"],
             calories=total_calories,
-            serving_size=amount
+            serving_size=amount,
+            protein=(selected_food.get("protein", 0) * amount) / 100,
+            carbs=(selected_food.get("carbs", 0) * amount) / 100,
+            fat=(selected_food.get("fat", 0) * amount) / 100
         )
+        invalidate_charts(message.from_user.id)
         
-        user = get_user(message.from_user.id)
-        today_calories = get_today_calories(message.from_user.id)
+        user = await get_user(message.from_user.id)
+        today_calories = await get_today_calories(message.from_user.id)
         
         await message.answer(
             f"✅ Записано: {selected_food['name']}\n"
             f"📊 Количество: {amount:.0f} г\n"
             f"🔥 Калории: {total_calories:.1f} ккал\n"
-            f"📈 Всего за день: {today_calories:.0f} / {user['calorie_goal']:.0f} ккал"
+            f"📈 Всего за день: {today_calories:.0f} / {user.calorie_goal:.0f} ккал"
         )
         
         await state.clear()
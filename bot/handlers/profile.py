@@ -145,7 +145,7 @@ async def process_city(message: Message, state: FSMContext):
         "calorie_goal": calorie_goal
     }
     
-    create_or_update_user(user_data)
+    await create_or_update_user(user_data)
     
     response_text = (
         f"✅ Профиль сохранен!\n\n"
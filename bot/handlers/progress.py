@@ -1,70 +1,84 @@
 from aiogram import Router
 from aiogram.filters import Command
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, BufferedInputFile  # Изменяем импорт
 from datetime import date
 from database.crud import (
-    get_user, get_water_today, 
-    get_calories_today, get_burned_calories_today,
+    get_user, get_daily_snapshot,
     get_weekly_summary
 )
 from services.visualizations import (
+    Chart,
     create_daily_progress_chart,
-    create_weekly_chart
+    create_weekly_chart,
+    remember_chart_file_id
 )
 
 router = Router()
 
+async def send_chart(message: Message, chart: Chart, caption: str, filename: str):
+    """Отправка графика: по file_id, если он уже загружался, иначе загрузкой PNG"""
+    if chart.file_id:
+        try:
+            await message.answer_photo(photo=chart.file_id, caption=caption)
+            return
+        except TelegramBadRequest:
+            # file_id больше недействителен - загружаем заново
+            chart.file_id = None
+    
+    sent = await message.answer_photo(
+        photo=BufferedInputFile(chart.png, filename=filename),
+        caption=caption
+    )
+    if sent.photo:
+        remember_chart_file_id(chart, sent.photo[-1].file_id)
+
 @router.message(Command("check_progress"))
 async def cmd_check_progress(message: Message):
-    user = get_user(message.from_user.id)
-    if not user:
+    snapshot = await get_daily_snapshot(message.from_user.id)
+    if not snapshot:
         await message.answer("Сначала настройте профиль командой /set_profile")
         return
     
-    water_today = get_water_today(user['user_id'])
-    calories_today = get_calories_today(user['user_id'])
-    burned_today = get_burned_calories_today(user['user_id'])
+    user = snapshot.user
+    water_today = snapshot.water_today
+    calories_today = snapshot.calories_today
+    burned_today = snapshot.burned_today
     
-    water_remaining = max(0, user['water_goal'] - water_today)
+    water_remaining = max(0, user.water_goal - water_today)
     calories_balance = calories_today - burned_today
-    calories_remaining = max(0, user['calorie_goal'] - calories_balance)
+    calories_remaining = max(0, user.calorie_goal - calories_balance)
     
     # Получаем график
-    chart_buffer = await create_daily_progress_chart(
+    chart = await create_daily_progress_chart(
+        user_id=user.user_id,
         water_consumed=water_today,
-        water_goal=user['water_goal'],
+        water_goal=user.water_goal,
         calories_consumed=calories_today,
         calories_burned=burned_today,
-        calorie_goal=user['calorie_goal']
+        calorie_goal=user.calorie_goal
     )
     
     report = (
         f"📊 Ваш прогресс на {date.today().strftime('%d.%m.%Y')}\n\n"
         f"💧 Вода:\n"
         f"  ├ Выпито: {water_today:.0f} мл\n"
-        f"  ├ Цель: {user['water_goal']:.0f} мл\n"
+        f"  ├ Цель: {user.water_goal:.0f} мл\n"
         f"  └ Осталось: {water_remaining:.0f} мл\n"
-        f"    Прогресс: {(water_today / user['water_goal'] * 100):.1f}%\n\n"
+        f"    Прогресс: {(water_today / user.water_goal * 100):.1f}%\n\n"
         f"🔥 Калории:\n"
         f"  ├ Потреблено: {calories_today:.0f} ккал\n"
         f"  ├ Сожжено: {burned_today:.0f} ккал\n"
         f"  ├ Баланс: {calories_balance:.0f} ккал\n"
-        f"  ├ Цель: {user['calorie_goal']:.0f} ккал\n"
+        f"  ├ Цель: {user.calorie_goal:.0f} ккал\n"
         f"  └ Осталось: {calories_remaining:.0f} ккал\n"
-        f"    Прогресс: {(calories_balance / user['calorie_goal'] * 100):.1f}%"
+        f"    Прогресс: {(calories_balance / user.calorie_goal * 100):.1f}%\n\n"
+        f"🥗 БЖУ: {snapshot.protein_today:.0f} / "
+        f"{snapshot.carbs_today:.0f} / {snapshot.fat_today:.0f} г"
     )
     
-    if chart_buffer:
-        # Получаем байты из буфера
-        chart_bytes = chart_buffer.getvalue()
-        
-        # Создаем BufferedInputFile
-        photo = BufferedInputFile(chart_bytes, filename="progress.png")
-        
-        await message.answer_photo(
-            photo=photo,
-            caption=report
-        )
+    if chart:
+        await send_chart(message, chart, report, "progress.png")
     else:
         # Если график не создался, отправляем только текст
         await message.answer(report)
@@ -75,24 +89,24 @@ async def cmd_check_progress(message: Message):
 
 @router.message(Command("weekly_stats"))
 async def cmd_weekly_stats(message: Message):
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     if not user:
         await message.answer("Сначала настройте профиль командой /set_profile")
         return
     
-    weekly_data = get_weekly_summary(user['user_id'])
+    weekly_data = await get_weekly_summary(user.user_id)
     
     report = "📈 Ваша недельная статистика\n\n"
     has_data = False
     
     for day_data in weekly_data:
-        if day_data["date"]:
-            date_str = day_data["date"].strftime("%d.%m")
+        if day_data.date:
+            date_str = day_data.date.strftime("%d.%m")
             report += (
                 f"{date_str}: "
-                f"💧 {day_data['water']:.0f} мл | "
-                f"🔥 {day_data['calories']:.0f} ккал | "
-                f"🏃 {day_data['workouts']} тренировок\n"
+                f"💧 {day_data.water:.0f} мл | "
+                f"🔥 {day_data.calories:.0f} ккал | "
+                f"🏃 {day_data.workouts} тренировок\n"
             )
             has_data = True
     
@@ -100,18 +114,9 @@ async def cmd_weekly_stats(message: Message):
         report += "Нет данных за последнюю неделю"
     
     # Пытаемся создать график
-    chart_buffer = await create_weekly_chart(weekly_data)
+    chart = await create_weekly_chart(user.user_id, weekly_data)
     
-    if chart_buffer:
-        # Получаем байты из буфера
-        chart_bytes = chart_buffer.getvalue()
-        
-        # Создаем BufferedInputFile
-        photo = BufferedInputFile(chart_bytes, filename="weekly_stats.png")
-        
-        await message.answer_photo(
-            photo=photo,
-            caption=report
-        )
+    if chart:
+        await send_chart(message, chart, report, "weekly_stats.png")
     else:
         await message.answer(report)
\ No newline at end of file
@@ -2,34 +2,32 @@ from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
 from datetime import datetime
-from database.crud import (
-    get_user, get_water_today, 
-    get_calories_today, get_last_workout
-)
+from database.crud import get_daily_snapshot
 from services.nutrition import get_low_calorie_foods
 
 router = Router()
 
 @router.message(Command("recommend"))
 async def cmd_recommend(message: Message):
-    user = get_user(message.from_user.id)
-    if not user:
+    snapshot = await get_daily_snapshot(message.from_user.id)
+    if not snapshot:
         await message.answer("Сначала настройте профиль командой /set_profile")
         return
     
-    water_today = get_water_today(user['user_id'])
-    calories_today = get_calories_today(user['user_id'])
-    last_workout = get_last_workout(user['user_id'])
+    user = snapshot.user
+    water_today = snapshot.water_today
+    calories_today = snapshot.calories_today
+    last_workout = snapshot.last_workout
     
     recommendations = []
     
-    water_percentage = (water_today / user['water_goal']) * 100
+    water_percentage = (water_today / user.water_goal) * 100
     if water_percentage < 50:
         recommendations.append("💧 Вы пьете мало воды. Попробуйте выпить стакан прямо сейчас!")
     elif water_percentage < 80:
         recommendations.append("💧 Вода: хороший прогресс. Не забывайте пить регулярно.")
     
-    calories_percentage = (calories_today / user['calorie_goal']) * 100
+    calories_percentage = (calories_today / user.calorie_goal) * 100
     current_hour = datetime.now().hour
     
     if calories_percentage > 90 and current_hour < 20:
@@ -43,7 +41,7 @@ async def cmd_recommend(message: Message):
     
     if last_workout:
         from datetime import datetime as dt
-        days_since_last = (dt.now() - dt.fromisoformat(last_workout['timestamp'])).days
+        days_since_last = (dt.now() - dt.fromisoformat(last_workout.timestamp)).days
         if days_since_last > 2:
             recommendations.append(
                 f"🏃‍♂️ Прошло {days_since_last} дней с последней тренировки. "
@@ -14,14 +14,14 @@ async def cmd_start(message: Message, state: FSMContext):
     """Обработчик команды /start"""
     await state.clear()
     
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     
     if user:
         welcome_text = (
             f"👋 С возвращением, {message.from_user.first_name}!\n\n"
             f"🎯 Ваши текущие цели:\n"
-            f"• 💧 Вода: {user['water_goal']:.0f} мл/день\n"
-            f"• 🔥 Калории: {user['calorie_goal']:.0f} ккал/день\n\n"
+            f"• 💧 Вода: {user.water_goal:.0f} мл/день\n"
+            f"• 🔥 Калории: {user.calorie_goal:.0f} ккал/день\n\n"
             f"📊 Для просмотра прогресса используйте команду /check_progress\n"
             f"📝 Или выберите действие в меню ниже:"
         )
@@ -157,7 +157,7 @@ async def help_button(message: Message):
 @router.message(Command("my_profile"))
 async def cmd_my_profile(message: Message):
     """Просмотр профиля"""
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     
     if not user:
         await message.answer("📋 Профиль не найден. Используйте /set_profile")
@@ -171,22 +171,22 @@ async def cmd_my_profile(message: Message):
         "very_active": "Очень активный"
     }
     
-    activity_ru = activity_map.get(user['activity_level'], "Не указано")
-    gender_ru = "Мужской" if user['gender'] == "male" else "Женский"
+    activity_ru = activity_map.get(user.activity_level, "Не указано")
+    gender_ru = "Мужской" if user.gender == "male" else "Женский"
     
     profile_text = (
         f"👤 Ваш профиль\n\n"
         f"📊 Основные данные:\n"
-        f"• Вес: {user['weight'] or 'Не указано'} кг\n"
-        f"• Рост: {user['height'] or 'Не указано'} см\n"
-        f"• Возраст: {user['age'] or 'Не указано'} лет\n"
+        f"• Вес: {user.weight or 'Не указано'} кг\n"
+        f"• Рост: {user.height or 'Не указано'} см\n"
+        f"• Возраст: {user.age or 'Не указано'} лет\n"
         f"• Пол: {gender_ru}\n"
         f"• Активность: {activity_ru}\n"
-        f"• Город: {user['city'] or 'Не указано'}\n\n"
+        f"• Город: {user.city or 'Не указано'}\n\n"
         
         f"🎯 Цели:\n"
-        f"• 💧 Вода: {user['water_goal'] or 2000} мл/день\n"
-        f"• 🔥 Калории: {user['calorie_goal'] or 2000} ккал/день"
+        f"• 💧 Вода: {user.water_goal or 2000} мл/день\n"
+        f"• 🔥 Калории: {user.calorie_goal or 2000} ккал/день"
     )
     
     await message.answer(profile_text)
@@ -223,7 +223,7 @@ async def reset_confirm(callback_query):
     from database.crud import get_user, create_or_update_user
     
     user_id = callback_query.from_user.id
-    user = get_user(user_id)
+    user = await get_user(user_id)
     
     if user:
         # Сбрасываем цели к значениям по умолчанию
@@ -238,7 +238,7 @@ async def reset_confirm(callback_query):
             "activity_level": "moderate",
             "city": None
         }
-        create_or_update_user(user_data)
+        await create_or_update_user(user_data)
         
         await callback_query.message.answer(
             "✅ Ваши данные были сброшены к значениям по умолчанию.\n"
@@ -6,24 +6,26 @@ from database.crud import (
     get_user, add_water_log, 
     get_water_today
 )
+from services.visualizations import invalidate_charts
 
 router = Router()
 
 async def process_water(message: Message, amount: float):
-    user = get_user(message.from_user.id)
+    user = await get_user(message.from_user.id)
     if not user:
         await message.answer("Сначала настройте профиль командой /set_profile")
         return
     
-    add_water_log(message.from_user.id, amount)
+    await add_water_log(message.from_user.id, amount)
+    invalidate_charts(message.from_user.id)
     
-    today_water = get_water_today(message.from_user.id)
+    today_water = await get_water_today(message.from_user.id)
     
     await message.answer(
         f"✅ Записано: {amount:.0f} мл воды\n"
         f"💧 Сегодня выпито: {today_water:.0f} мл\n"
-        f"🎯 Цель: {user['water_goal']:.0f} мл\n"
-        f"📊 Прогресс: {(today_water / user['water_goal'] * 100):.1f}%"
+        f"🎯 Цель: {user.water_goal:.0f} мл\n"
+        f"📊 Прогресс: {(today_water / user.water_goal * 100):.1f}%"
     )
 
 @router.message(Command("log_water"))
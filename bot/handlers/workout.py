@@ -5,6 +5,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton
 from database.crud import add_workout_log, get_user
 from services.calculations import calculate_workout_calories
+from services.visualizations import invalidate_charts
 
 router = Router()
 
@@ -50,7 +51,7 @@ async def process_workout_duration(message: Message, state: FSMContext):
         data = await state.get_data()
         workout_type = data.get("workout_type")
         
-        user = get_user(message.from_user.id)
+        user = await get_user(message.from_user.id)
         if not user:
             await message.answer("Сначала настройте профиль командой /set_profile")
             return
@@ -58,15 +59,16 @@ async def process_workout_duration(message: Message, state: FSMContext):
         calories_burned = calculate_workout_calories(
             workout_type=workout_type,
             duration=duration,
-            weight=user['weight']
+            weight=user.weight
         )
         
-        add_workout_log(
+        await add_workout_log(
             user_id=message.from_user.id,
             workout_type=workout_type,
             duration=duration,
             calories_burned=calories_burned
         )
+        invalidate_charts(message.from_user.id)
         
         extra_water = (duration // 30) * 200
         
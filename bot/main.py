@@ -1,15 +1,6 @@
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
-from config import settings
-from handlers import (
-    start, profile, water, food, 
-    workout, progress, recommendations
-)
 from os import getenv
-from database import init_db
-from middlewares.logging_middleware import LoggingMiddleware
 
 # Получаем токен из переменных окружения
 TOKEN = getenv("BOT_TOKEN")
@@ -18,42 +9,39 @@ if TOKEN is None:
     raise ValueError("Ошибка: Токен бота не найден! Проверьте файл .env")
 
 async def main():
-    # Настраиваем логирование с детальной информацией
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler("bot_logs.log", encoding="utf-8"),
-            logging.StreamHandler()
-        ]
-    )
+    # Бот импортируется здесь, а не при загрузке модуля: процессы пула (spawn)
+    # заново выполняют main.py, и процессу отрисовки графиков не нужны aiogram и обработчики
+    from aiogram import Bot
+    from config import settings
+    from app import setup_logging, create_dispatcher
+    from database import init_db
+    from sharding import ShardPool, create_front_dispatcher
+    from webhook import run_webhook
     
-    # Инициализация базы данных (синхронно)
-    init_db()
-    logging.info("База данных инициализирована")
+    setup_logging()
+    
+    # Миграции применяются в отдельном потоке, параллельно с подготовкой бота
+    db_ready = asyncio.create_task(asyncio.to_thread(init_db))
     
     # Инициализация бота и диспетчера
     bot = Bot(token=TOKEN)
-    storage = MemoryStorage()
-    dp = Dispatcher(storage=storage)
-    
-    # Добавляем middleware для логирования
-    dp.update.middleware(LoggingMiddleware())
-    
-    # Регистрация роутеров
-    dp.include_router(start.router)
-    dp.include_router(profile.router)
-    dp.include_router(water.router)
-    dp.include_router(food.router)
-    dp.include_router(workout.router)
-    dp.include_router(progress.router)
-    dp.include_router(recommendations.router)
+    if settings.WORKERS > 1:
+        # Обновления обрабатываются в рабочих процессах, распределенных по user_id
+        dp, limiter = create_front_dispatcher(ShardPool(settings.WORKERS, create_dispatcher))
+    else:
+        dp, limiter = create_dispatcher()
     
     logging.info("Бот запускается...")
     
-    # Запуск бота с очисткой обновлений
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    await db_ready
+    logging.info("База данных инициализирована")
+    
+    if settings.BOT_MODE == "webhook":
+        await run_webhook(bot, dp, limiter)
+    else:
+        # Long polling несовместим с установленным webhook
+        await bot.delete_webhook(drop_pending_updates=settings.DROP_PENDING_UPDATES)
+        await dp.start_polling(bot)
 
 if __name__ == "__main__":
     try:
@@ -61,4 +49,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logging.info("Бот остановлен")
     except Exception as e:
-        logging.error(f"Ошибка при запуске бота: {e}")
\ No newline at end of file
+        logging.error(f"Ошибка при запуске бота: {e}")
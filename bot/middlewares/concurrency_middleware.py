@@ -0,0 +1,39 @@
+import asyncio
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from typing import Any, Awaitable, Callable, Dict
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Ограничение числа одновременно обрабатываемых обновлений.
+
+    Остальные обновления ждут своей очереди, а не запускаются все сразу
+    (в режиме webhook каждое обновление обрабатывается отдельной задачей).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting}
@@ -0,0 +1,23 @@
+from aiogram import BaseMiddleware
+from aiogram.types import Update, User
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class ShardRouterMiddleware(BaseMiddleware):
+    """Передача обновлений рабочим процессам вместо обработки на месте.
+
+    Все обновления одного пользователя попадают в один и тот же процесс,
+    поэтому диалоги FSM обрабатываются по порядку.
+    """
+
+    def __init__(self, shards):
+        self.shards = shards
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        # event_from_user заполняет стандартный UserContextMiddleware aiogram
+        user: Optional[User] = data.get("event_from_user")
+        await self.shards.dispatch(user.id if user else 0, event)
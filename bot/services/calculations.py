@@ -1,17 +1,44 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Прибавка к норме воды за активность, мл
+WATER_ACTIVITY_BONUS = {
+    "sedentary": 0,
+    "light": 200,
+    "moderate": 400,
+    "active": 600,
+    "very_active": 800
+}
+
+# Коэффициенты активности для нормы калорий
+CALORIE_ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9
+}
+
+# MET (Metabolic Equivalent of Task) values
+MET_VALUES = {
+    "Бег": 8.0,
+    "Ходьба": 3.5,
+    "Велосипед": 7.5,
+    "Плавание": 6.0,
+    "Силовая": 6.0,
+    "Йога": 2.5,
+    "Другое": 4.0
+}
+
 def calculate_water_goal(weight: float, activity_level: str, temperature: float) -> float:
     """Расчет нормы воды"""
     # Базовая норма: 30 мл на кг веса
     base_water = weight * 30
     
     # Учет активности
-    activity_multipliers = {
-        "sedentary": 0,
-        "light": 200,
-        "moderate": 400,
-        "active": 600,
-        "very_active": 800
-    }
-    activity_water = activity_multipliers.get(activity_level, 0)
+    activity_water = WATER_ACTIVITY_BONUS.get(activity_level, 0)
     
     # Учет температуры
     temperature_bonus = 0
@@ -22,7 +49,7 @@ def calculate_water_goal(weight: float, activity_level: str, temperature: float)
     
     return base_water + activity_water + temperature_bonus
 
-def calculate_calorie_goal(weight: float, height: float, age: int, 
+def calculate_calorie_goal(weight: float, height: float, age: int,
                           gender: str, activity_level: str) -> float:
     """Расчет нормы калорий по формуле Миффлина-Сан Жеора"""
     # BMR (Basal Metabolic Rate)
@@ -32,37 +59,18 @@ def calculate_calorie_goal(weight: float, height: float, age: int,
         bmr = 10 * weight + 6.25 * height - 5 * age - 161
     
     # Умножаем на коэффициент активности
-    activity_multipliers = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "active": 1.725,
-        "very_active": 1.9
-    }
-    
-    multiplier = activity_multipliers.get(activity_level, 1.2)
+    multiplier = CALORIE_ACTIVITY_MULTIPLIERS.get(activity_level, 1.2)
     return bmr * multiplier
 
 def calculate_workout_calories(workout_type: str, duration: int, weight: float) -> float:
     """Расчет сожженных калорий во время тренировки"""
-    # MET (Metabolic Equivalent of Task) values
-    met_values = {
-        "Бег": 8.0,
-        "Ходьба": 3.5,
-        "Велосипед": 7.5,
-        "Плавание": 6.0,
-        "Силовая": 6.0,
-        "Йога": 2.5,
-        "Другое": 4.0
-    }
-    
-    met = met_values.get(workout_type, 4.0)
+    met = MET_VALUES.get(workout_type, 4.0)
     
     # Формула: калории = MET * вес (кг) * время (часы)
     calories = met * weight * (duration / 60)
     return calories
 
-def calculate_goals(weight: float, height: float, age: int, 
+def calculate_goals(weight: float, height: float, age: int,
                    gender: str, activity_level: str, temperature: float) -> dict:
     """Расчет всех целей"""
     water_goal = calculate_water_goal(weight, activity_level, temperature)
@@ -71,4 +79,71 @@ def calculate_goals(weight: float, height: float, age: int,
     return {
         "water_goal": water_goal,
         "calorie_goal": calorie_goal
-    }
\ No newline at end of file
+    }
+
+# --- Пакетные версии для массивов NumPy ---
+# Порядок операций повторяет скалярные функции, поэтому результаты
+# совпадают с ними побитово. NumPy импортируется при первом вызове,
+# чтобы не замедлять запуск бота.
+
+def _as_str_array(values) -> "np.ndarray":
+    import numpy as np
+    values = np.asarray(values)
+    if values.dtype.kind not in "US":
+        values = values.astype(str)
+    return values
+
+def _lookup(keys, table: dict, default: float) -> "np.ndarray":
+    """Векторизованный table.get(key, default) для массива строк"""
+    import numpy as np
+    keys = _as_str_array(keys)
+    values = np.full(keys.shape, default, dtype=np.float64)
+    for key, value in table.items():
+        values[keys == key] = value
+    return values
+
+def calculate_water_goal_batch(weights, activity_levels, temperatures) -> "np.ndarray":
+    """Норма воды для массива пользователей"""
+    import numpy as np
+    weights = np.asarray(weights, dtype=np.float64)
+    temperatures = np.asarray(temperatures, dtype=np.float64)
+
+    base_water = weights * 30
+    activity_water = _lookup(activity_levels, WATER_ACTIVITY_BONUS, 0)
+    # Как и в скалярной версии, ветка "> 30" недостижима
+    temperature_bonus = np.where(temperatures > 25, 500.0,
+                                 np.where(temperatures > 30, 1000.0, 0.0))
+
+    return base_water + activity_water + temperature_bonus
+
+def calculate_calorie_goal_batch(weights, heights, ages, genders, activity_levels) -> "np.ndarray":
+    """Норма калорий для массива пользователей"""
+    import numpy as np
+    weights = np.asarray(weights, dtype=np.float64)
+    heights = np.asarray(heights, dtype=np.float64)
+    ages = np.asarray(ages, dtype=np.float64)
+    is_male = _as_str_array(genders) == "male"
+
+    bmr = np.where(
+        is_male,
+        10 * weights + 6.25 * heights - 5 * ages + 5,
+        10 * weights + 6.25 * heights - 5 * ages - 161
+    )
+    multiplier = _lookup(activity_levels, CALORIE_ACTIVITY_MULTIPLIERS, 1.2)
+    return bmr * multiplier
+
+def calculate_workout_calories_batch(workout_types, durations, weights) -> "np.ndarray":
+    """Сожженные калории для массива тренировок"""
+    import numpy as np
+    met = _lookup(workout_types, MET_VALUES, 4.0)
+    durations = np.asarray(durations, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    return met * weights * (durations / 60)
+
+def calculate_goals_batch(weights, heights, ages, genders,
+                          activity_levels, temperatures) -> dict:
+    """Расчет всех целей для массива пользователей"""
+    return {
+        "water_goal": calculate_water_goal_batch(weights, activity_levels, temperatures),
+        "calorie_goal": calculate_calorie_goal_batch(weights, heights, ages, genders, activity_levels)
+    }
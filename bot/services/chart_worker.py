@@ -0,0 +1,193 @@
+# services/chart_worker.py
+"""Отрисовка графиков в процессах пула (см. services/visualizations.py).
+
+Модуль импортируется только рабочими процессами: matplotlib загружается
+один раз при старте процесса, а графики строятся через объектный API
+Figure без глобального состояния pyplot. На вход приходят простые данные
+(числа и строки), на выходе - байты PNG.
+
+Фигуры с осями, подписями и раскладкой создаются один раз на процесс
+(шаблоны), а при каждой отрисовке меняются только данные. Раскладка
+задана отступами заранее: tight_layout и bbox_inches='tight' были самой
+дорогой частью отрисовки.
+"""
+import io
+import math
+from typing import List, Optional
+
+WEEK_DAYS = 7   # точек на недельном графике не больше, чем дней в неделе
+DPI = 100
+
+_daily: Optional["DailyTemplate"] = None
+_weekly: Optional["WeeklyTemplate"] = None
+
+def init_worker():
+    """Инициализатор рабочего процесса: загрузка matplotlib и создание шаблонов"""
+    import matplotlib
+    matplotlib.use("Agg")
+
+    global _daily, _weekly
+    _daily = DailyTemplate()
+    _weekly = WeeklyTemplate()
+
+def warm_up() -> bool:
+    """Пустая задача, чтобы процессы пула запустились заранее"""
+    return True
+
+def _new_figure(figsize: tuple):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(fig)
+    return fig
+
+def _to_png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI)
+    return buf.getvalue()
+
+def _pct_label(p: float) -> str:
+    return f'{p:.1f}%' if p > 0 else ''
+
+
+class DailyTemplate:
+    """Дневной прогресс: круговая диаграмма воды и столбцы баланса калорий"""
+
+    def __init__(self):
+        self.fig = _new_figure((12, 5))
+        self.fig.subplots_adjust(left=0.03, right=0.97, bottom=0.08, top=0.9, wspace=0.3)
+        water_ax, calories_ax = self.fig.subplots(1, 2)
+
+        # График воды; доли задаются при отрисовке
+        self.wedges, self.labels, self.pcts = water_ax.pie(
+            [1, 1], labels=['', ''], colors=['#4CAF50', '#E0E0E0'],
+            autopct=_pct_label, startangle=90, textprops={'fontsize': 9}
+        )
+        water_ax.set_title('Прогресс по воде', fontsize=14, fontweight='bold')
+
+        # График калорий
+        self.calories_ax = calories_ax
+        self.bars = calories_ax.bar(['Потреблено', 'Сожжено', 'Цель'], [1, 1, 1],
+                                    color=['#FF9800', '#2196F3', '#4CAF50'])
+        calories_ax.set_ylabel('Ккал', fontsize=12)
+        calories_ax.set_title('Баланс калорий', fontsize=14, fontweight='bold')
+        self.bar_labels = [
+            calories_ax.text(bar.get_x() + bar.get_width()/2., 0, '',
+                             ha='center', va='bottom', fontsize=9)
+            for bar in self.bars
+        ]
+
+    def _update_pie(self, values: List[float]):
+        # Те же углы и положения подписей, что считает Axes.pie
+        total = sum(values)
+        theta1 = 90.0
+        for wedge, label, pct, value in zip(self.wedges, self.labels, self.pcts, values):
+            fraction = value / total
+            theta2 = theta1 + 360.0 * fraction
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+
+            angle = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(angle), math.sin(angle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(_pct_label(100.0 * fraction))
+            theta1 = theta2
+
+    def render(self, water_consumed: float, water_goal: float,
+               calories_consumed: float, calories_burned: float,
+               calorie_goal: float) -> bytes:
+        water_values = [water_consumed, max(0, water_goal - water_consumed)]
+        self._update_pie(water_values)
+        self.labels[0].set_text(f'Выпито\n{water_consumed:.0f} мл')
+        self.labels[1].set_text(f'Осталось\n{water_values[1]:.0f} мл')
+
+        values = [calories_consumed, calories_burned, calorie_goal]
+        for bar, label, value in zip(self.bars, self.bar_labels, values):
+            bar.set_height(value)
+            label.set_y(value + 10)
+            label.set_text(f'{value:.0f}')
+        self.calories_ax.relim()
+        self.calories_ax.autoscale_view()
+
+        return _to_png(self.fig)
+
+
+class WeeklyTemplate:
+    """Потребление воды и калорий за неделю: две линии с заливкой"""
+
+    def __init__(self):
+        self.fig = _new_figure((10, 8))
+        self.fig.subplots_adjust(left=0.09, right=0.97, bottom=0.08, top=0.95, hspace=0.3)
+        water_ax, calories_ax = self.fig.subplots(2, 1)
+
+        self.series = [
+            self._series(water_ax, '#4CAF50', 'Потребление воды за неделю', 'мл'),
+            self._series(calories_ax, '#FF9800', 'Потребление калорий за неделю', 'ккал'),
+        ]
+        calories_ax.set_xlabel('Дата', fontsize=12)
+
+    @staticmethod
+    def _series(ax, color: str, title: str, ylabel: str) -> dict:
+        from matplotlib.collections import PolyCollection
+
+        line, = ax.plot([], [], marker='o', color=color, linewidth=2)
+        fill = PolyCollection([], alpha=0.3, facecolor=color, edgecolor=color)
+        ax.add_collection(fill, autolim=False)
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.grid(True, alpha=0.3)
+
+        # Подписи значений на точках; лишние скрываются
+        labels = [
+            ax.text(0, 0, '', ha='center', va='bottom', fontsize=8, visible=False)
+            for _ in range(WEEK_DAYS)
+        ]
+        return {"ax": ax, "line": line, "fill": fill, "labels": labels}
+
+    @staticmethod
+    def _update(series: dict, dates: List[str], values: List[float]):
+        ax = series["ax"]
+        xs = list(range(len(values)))
+
+        series["line"].set_data(xs, values)
+        series["fill"].set_verts([
+            [(xs[0], 0), *zip(xs, values), (xs[-1], 0)]
+        ])
+        for i, label in enumerate(series["labels"]):
+            label.set_visible(i < len(values))
+            if i < len(values):
+                label.set_position((i, values[i] + 50))
+                label.set_text(f'{values[i]:.0f}')
+
+        # Даты по оси X - как у категориальной оси, с полями 5%
+        ax.set_xticks(xs, dates)
+        x_margin = 0.05 * (xs[-1] - xs[0]) or 0.05
+        ax.set_xlim(xs[0] - x_margin, xs[-1] + x_margin)
+
+        low, high = min(0, *values), max(0, *values)
+        y_margin = 0.05 * (high - low) or 0.05
+        ax.set_ylim(low - y_margin, high + y_margin)
+
+    def render(self, dates: List[str], water_values: List[float],
+               calorie_values: List[float]) -> bytes:
+        # Точек больше недели не бывает: get_weekly_summary отдает 7 дней
+        dates = dates[-WEEK_DAYS:]
+        self._update(self.series[0], dates, water_values[-WEEK_DAYS:])
+        self._update(self.series[1], dates, calorie_values[-WEEK_DAYS:])
+        return _to_png(self.fig)
+
+
+def render_daily_progress(water_consumed: float, water_goal: float,
+                          calories_consumed: float, calories_burned: float,
+                          calorie_goal: float) -> bytes:
+    """PNG с дневным прогрессом по воде и калориям"""
+    return _daily.render(water_consumed, water_goal, calories_consumed,
+                         calories_burned, calorie_goal)
+
+def render_weekly(dates: List[str], water_values: List[float],
+                  calorie_values: List[float]) -> bytes:
+    """PNG с потреблением воды и калорий за неделю"""
+    return _weekly.render(dates, water_values, calorie_values)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+from config import settings
+from database.crud import get_user_cities, get_users_batch, update_water_goals
+from services.calculations import calculate_water_goal_batch
+from services.weather import fetch_temperature, normalize_city
+
+WEATHER_CONCURRENCY = 10   # одновременных запросов погоды
+USERS_BATCH_SIZE = 5000    # пользователей на одну транзакцию UPDATE
+
+_refresh_task: Optional[asyncio.Task] = None
+
+async def _fetch_city_temperatures() -> Dict[str, float]:
+    """Температура по нормализованному городу; каждый город запрашивается один раз"""
+    cities = {}
+    for city in await get_user_cities():
+        cities.setdefault(normalize_city(city), city)
+
+    semaphore = asyncio.Semaphore(WEATHER_CONCURRENCY)
+
+    async def fetch(city: str) -> Optional[float]:
+        async with semaphore:
+            return await fetch_temperature(city)
+
+    temperatures = await asyncio.gather(*(fetch(city) for city in cities.values()))
+
+    # Города без данных пропускаем, чтобы не сбрасывать нормы к температуре по умолчанию
+    return {
+        key: temperature
+        for key, temperature in zip(cities, temperatures)
+        if temperature is not None
+    }
+
+async def refresh_water_goals() -> int:
+    """Пересчет норм воды по текущей погоде; возвращает число обновленных пользователей"""
+    temperatures = await _fetch_city_temperatures()
+    if not temperatures:
+        return 0
+
+    updated = 0
+    last_user_id = 0
+    while True:
+        users = await get_users_batch(last_user_id, USERS_BATCH_SIZE)
+        if not users:
+            break
+        last_user_id = users[-1][0]
+
+        rows, weights, activity_levels, city_temperatures = [], [], [], []
+        for row in users:
+            _, weight, activity_level, city, _ = row
+            temperature = temperatures.get(normalize_city(city))
+            if temperature is None:
+                continue
+            rows.append(row)
+            weights.append(weight)
+            activity_levels.append(activity_level)
+            city_temperatures.append(temperature)
+
+        # Нормы всей пачки считаются одним векторным вызовом
+        new_goals = calculate_water_goal_batch(weights, activity_levels, city_temperatures)
+        # Прочитанные значения - условие UPDATE (см. update_water_goals)
+        goals = [
+            (goal, *row)
+            for goal, row in zip(new_goals.tolist(), rows)
+            if goal != row[4]
+        ]
+
+        updated += await update_water_goals(goals)
+
+    return updated
+
+async def run_water_goal_refresh(interval: float):
+    """Периодический пересчет норм воды (запускается фоновой задачей)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            updated = await refresh_water_goals()
+            logging.info(f"Нормы воды пересчитаны по погоде, обновлено: {updated}")
+        except Exception as e:
+            logging.error(f"Ошибка пересчета норм воды: {e}")
+
+async def start_water_goal_refresh():
+    """Запуск фонового пересчета норм воды (при запуске бота)"""
+    global _refresh_task
+    interval = settings.WATER_GOAL_REFRESH_INTERVAL
+    if interval > 0 and _refresh_task is None:
+        _refresh_task = asyncio.create_task(run_water_goal_refresh(interval))
+
+async def stop_water_goal_refresh():
+    """Остановка фонового пересчета норм воды (при остановке бота)"""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
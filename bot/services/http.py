@@ -0,0 +1,45 @@
+import aiohttp
+from typing import Optional
+
+# Ограничения на внешние API
+CONNECT_TIMEOUT = 3      # установка соединения, сек
+READ_TIMEOUT = 10        # ожидание данных из сокета, сек
+TOTAL_CONNECTIONS = 100
+CONNECTIONS_PER_HOST = 20
+DNS_CACHE_TTL = 300      # сек
+KEEPALIVE_TIMEOUT = 30   # сколько держим простаивающее соединение, сек
+
+_session: Optional[aiohttp.ClientSession] = None
+
+def _create_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        limit=TOTAL_CONNECTIONS,
+        limit_per_host=CONNECTIONS_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    timeout = aiohttp.ClientTimeout(
+        connect=CONNECT_TIMEOUT,
+        sock_read=READ_TIMEOUT
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+async def init_http_session():
+    """Создание общей HTTP-сессии приложения (при запуске бота)"""
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Общая HTTP-сессия с пулом keep-alive соединений"""
+    global _session
+    if _session is None or _session.closed:
+        _session = _create_session()
+    return _session
+
+async def close_http_session():
+    """Закрытие общей HTTP-сессии (при остановке бота)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
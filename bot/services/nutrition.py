@@ -1,8 +1,161 @@
 import aiohttp
+import asyncio
+import hashlib
+import logging
+import time
 from typing import List, Dict, Optional
+from database.crud import (
+    get_cached_food_search, save_food_search, evict_food_search_cache,
+    search_food_catalog, get_catalog_products,
+    get_cached_products, save_cached_products, evict_cached_products
+)
+from config import settings
+from services.http import get_http_session
+from utils.cache import TTLCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.singleflight import SingleFlight
 
-async def search_food(query: str) -> List[Dict]:
-    """Поиск продуктов в OpenFoodFacts"""
+SEARCH_FRESH_TTL = 24 * 60 * 60        # результат не обновляется, сек
+SEARCH_MAX_STALE = 7 * 24 * 60 * 60    # устаревший результат еще отдается, сек
+SEARCH_MEMORY_ENTRIES = 2000
+SEARCH_PERSISTENT_ENTRIES = 50000
+EVICT_EVERY = 100                      # чистка SQLite-кэша раз в N сохранений
+PRODUCT_MEMORY_ENTRIES = 5000
+PRODUCT_MEMORY_TTL = 60 * 60           # сек
+PRODUCT_PERSISTENT_TTL = settings.FSM_STATE_TTL   # продукт нужен, пока жив диалог
+
+# Горячие запросы в памяти, остальные - в SQLite (переживают перезапуск).
+# Значение - (продукты, время получения)
+_search_cache = TTLCache(maxsize=SEARCH_MEMORY_ENTRIES, ttl=SEARCH_MAX_STALE)
+_inflight = SingleFlight()
+# Продукты по коду: в данных FSM хранятся только коды
+_product_cache = TTLCache(maxsize=PRODUCT_MEMORY_ENTRIES, ttl=PRODUCT_MEMORY_TTL)
+_background_tasks = set()
+_saves_since_eviction = 0
+_product_saves_since_eviction = 0
+
+def normalize_query(query: str) -> str:
+    """Ключ кэша поиска: регистр и лишние пробелы не важны"""
+    return " ".join(query.casefold().replace("ё", "е").split())
+
+async def search_food(query: str,
+                      session: Optional[aiohttp.ClientSession] = None) -> List[Dict]:
+    """Поиск продуктов в локальном каталоге и OpenFoodFacts.
+
+    Нечеткий поиск по каталогу (опечатки) - запасной вариант: он быстрее
+    API и в гонке побеждал бы верный ответ OpenFoodFacts, поэтому
+    выполняется, только если API ничего не дал или недоступен.
+    """
+    if settings.FOOD_SEARCH_RACE:
+        products = await _race_search(query, session)
+    else:
+        products = await _search_local(query) or await _search_remote(query, session)
+    return products or await _search_local(query, fuzzy=True)
+
+async def _race_search(query: str, session: Optional[aiohttp.ClientSession]) -> List[Dict]:
+    """Каталог (без опечаток) и API опрашиваются одновременно,
+    побеждает первый непустой ответ"""
+    pending = {
+        asyncio.ensure_future(_search_local(query)),
+        asyncio.ensure_future(_search_remote(query, session)),
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                products = task.result()
+                if products:
+                    return products
+        return []
+    finally:
+        # Запрос к API продолжится в фоне и заполнит кэш
+        for task in pending:
+            task.cancel()
+
+async def _search_local(query: str, fuzzy: bool = False) -> List[Dict]:
+    try:
+        return await search_food_catalog(query, fuzzy=fuzzy)
+    except Exception as e:
+        logging.warning(f"Локальный каталог продуктов недоступен: {e}")
+        return []
+
+async def _search_remote(query: str, session: Optional[aiohttp.ClientSession]) -> List[Dict]:
+    """Поиск в OpenFoodFacts через двухуровневый кэш"""
+    key = normalize_query(query)
+
+    entry = _search_cache.get(key)
+    if entry is None:
+        try:
+            entry = await get_cached_food_search(key)
+        except Exception as e:
+            logging.warning(f"Кэш поиска продуктов недоступен: {e}")
+        if entry is not None:
+            _search_cache.set(key, entry, ttl=SEARCH_MAX_STALE - (time.time() - entry[1]))
+
+    if entry is not None:
+        products, fetched_at = entry
+        age = time.time() - fetched_at
+        if age < SEARCH_FRESH_TTL:
+            return products
+        if age < SEARCH_MAX_STALE:
+            # Отдаем устаревший результат сразу, а обновляем его в фоне
+            if key not in _inflight:
+                _run_in_background(_inflight.do(key, lambda: _refresh_search(query, key, session)))
+            return products
+
+    # Если API недоступен, products будет None - продуктов не нашлось
+    products = await _inflight.do(key, lambda: _refresh_search(query, key, session))
+    return products or []
+
+def _run_in_background(coro):
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def _refresh_search(query: str, key: str,
+                          session: Optional[aiohttp.ClientSession]) -> Optional[List[Dict]]:
+    """Запрос к API и сохранение результата в оба уровня кэша; None - API недоступен"""
+    if not _breaker.allow_request():
+        return None
+
+    started = time.monotonic()
+    products = None
+    try:
+        async with asyncio.timeout(settings.FOOD_SEARCH_TIMEOUT):
+            products = await _fetch_products(query, session)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logging.warning(f"OpenFoodFacts не ответил на '{query}': {type(e).__name__} {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Ошибка обработки ответа OpenFoodFacts на '{query}': {type(e).__name__} {e}")
+        return None
+    finally:
+        # Исход записывается на любом пути, включая отмену: иначе пробный
+        # запрос полуоткрытого предохранителя так и остался бы "в полете"
+        if products is None:
+            _breaker.record_failure()
+        else:
+            _breaker.record_success()
+        _timings.record(time.monotonic() - started, ok=products is not None)
+
+    fetched_at = time.time()
+    _search_cache.set(key, (products, fetched_at))
+    _run_in_background(_persist_search(key, products, fetched_at))
+    return products
+
+async def _persist_search(key: str, products: List[Dict], fetched_at: float):
+    global _saves_since_eviction
+    try:
+        await save_food_search(key, products, fetched_at)
+        _saves_since_eviction += 1
+        if _saves_since_eviction >= EVICT_EVERY:
+            _saves_since_eviction = 0
+            await evict_food_search_cache(SEARCH_PERSISTENT_ENTRIES)
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить результаты поиска '{key}': {e}")
+
+async def _fetch_products(query: str,
+                          session: Optional[aiohttp.ClientSession]) -> List[Dict]:
     url = "https://world.openfoodfacts.org/cgi/search.pl"
     
     params = {
@@ -11,53 +164,107 @@ async def search_food(query: str) -> List[Dict]:
         "action": "process",
         "json": 1,
         "page_size": 10,
-        "fields": "product_name,nutriments"
+        "fields": "code,product_name,nutriments"
     }
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    products = []
-                    
-                    for product in data.get("products", []):
-                        if "product_name" in product and "nutriments" in product:
-                            nutriments = product["nutriments"]
-                            products.append({
-                                "name": product["product_name"],
-                                "calories": nutriments.get("energy-kcal_100g", 0),
-                                "protein": nutriments.get("proteins_100g", 0),
-                                "carbs": nutriments.get("carbohydrates_100g", 0),
-                                "fat": nutriments.get("fat_100g", 0)
-                            })
-                    
-                    return products
-        except:
-            pass
-    
-    # Если API недоступен, используем локальную базу
-    return get_food_from_local_db(query)
-
-def get_food_from_local_db(query: str) -> List[Dict]:
-    """Локальная база популярных продуктов"""
-    local_foods = {
-        "банан": {"name": "Банан", "calories": 89, "protein": 1.1, "carbs": 23, "fat": 0.3},
-        "яблоко": {"name": "Яблоко", "calories": 52, "protein": 0.3, "carbs": 14, "fat": 0.2},
-        "куриная грудка": {"name": "Куриная грудка", "calories": 165, "protein": 31, "carbs": 0, "fat": 3.6},
-        "рис": {"name": "Рис вареный", "calories": 130, "protein": 2.7, "carbs": 28, "fat": 0.3},
-        "яйцо": {"name": "Яйцо куриное", "calories": 155, "protein": 13, "carbs": 1.1, "fat": 11},
-        "овсянка": {"name": "Овсянка", "calories": 389, "protein": 16.9, "carbs": 66, "fat": 6.9},
+    session = session or get_http_session()
+    async with session.get(url, params=params) as response:
+        response.raise_for_status()
+        data = await response.json()
+        products = []
+        
+        for product in data.get("products", []):
+            nutriments = product.get("nutriments")
+            if product.get("product_name") and isinstance(nutriments, dict):
+                products.append({
+                    "code": product.get("code"),
+                    "name": product["product_name"],
+                    "calories": nutriments.get("energy-kcal_100g", 0),
+                    "protein": nutriments.get("proteins_100g", 0),
+                    "carbs": nutriments.get("carbohydrates_100g", 0),
+                    "fat": nutriments.get("fat_100g", 0)
+                })
+        
+        return products
+
+def product_code(product: Dict) -> str:
+    """Код продукта; у продуктов без штрихкода - производный от названия"""
+    if product.get("code"):
+        return str(product["code"])
+    digest = hashlib.blake2b(normalize_query(product["name"]).encode(), digest_size=8).hexdigest()
+    return f"name:{digest}"
+
+def remember_products(products: List[Dict]) -> List[str]:
+    """Запоминание показанных продуктов; возвращает их коды для данных FSM.
+
+    Ответ пользователю не ждет записи в базу: пока она идет в фоне,
+    продукты берутся из памяти.
+    """
+    products = [{**product, "code": product_code(product)} for product in products]
+    for product in products:
+        _product_cache.set(product["code"], product)
+    _run_in_background(_persist_products(products))
+    return [product["code"] for product in products]
+
+async def _persist_products(products: List[Dict]):
+    global _product_saves_since_eviction
+    try:
+        await save_cached_products(products, time.time())
+        _product_saves_since_eviction += 1
+        if _product_saves_since_eviction >= EVICT_EVERY:
+            _product_saves_since_eviction = 0
+            await evict_cached_products(time.time() - PRODUCT_PERSISTENT_TTL)
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить показанные продукты: {e}")
+
+async def get_product(code: Optional[str]) -> Optional[Dict]:
+    """Продукт по коду из remember_products()"""
+    if not code:
+        return None
+    product = _product_cache.get(code)
+    if product is None:
+        # После перезапуска: кэш продуктов, а для продуктов каталога - сам каталог
+        product = (await get_cached_products([code])).get(code)
+        if product is None:
+            product = (await get_catalog_products([code])).get(code)
+        if product is not None:
+            _product_cache.set(code, product)
+    return product
+
+class _Timings:
+    """Время ответов OpenFoodFacts: последнее и скользящее среднее, мс"""
+
+    def __init__(self, smoothing: float = 0.1):
+        self.smoothing = smoothing
+        self.last_ms = None
+        self.average_ms = None
+        self.timeouts_or_errors = 0
+
+    def record(self, seconds: float, ok: bool):
+        ms = seconds * 1000
+        self.last_ms = ms
+        if self.average_ms is None:
+            self.average_ms = ms
+        else:
+            self.average_ms += self.smoothing * (ms - self.average_ms)
+        if not ok:
+            self.timeouts_or_errors += 1
+
+_breaker = CircuitBreaker("openfoodfacts", failure_threshold=5, recovery_timeout=30)
+_timings = _Timings()
+
+def get_search_stats() -> dict:
+    """Состояние предохранителя OpenFoodFacts и время ответов"""
+    return {
+        "breaker": _breaker.stats(),
+        "last_ms": _timings.last_ms,
+        "average_ms": _timings.average_ms,
+        "errors": _timings.timeouts_or_errors,
     }
-    
-    results = []
-    query_lower = query.lower()
-    
-    for name, data in local_foods.items():
-        if query_lower in name or name in query_lower:
-            results.append(data)
-    
-    return results
+
+def get_search_cache_stats() -> dict:
+    """Счетчики кэша поиска продуктов в памяти"""
+    return _search_cache.stats()
 
 # Открой bot/services/nutrition.py и добавь:
 async def get_food_details(food_id):
@@ -0,0 +1,49 @@
+# services/stats.py
+"""Счетчики работы бота: предохранители, время ответов внешних API и кэши.
+
+Отдаются в GET /health (режим webhook) и периодически пишутся в журнал.
+Кэши у каждого процесса свои, поэтому при WORKERS > 1 журнал пишет каждый
+рабочий процесс.
+"""
+import asyncio
+import json
+import logging
+from typing import Optional
+from config import settings
+from database.crud import get_user_cache_stats
+from services.nutrition import get_search_cache_stats, get_search_stats
+from services.weather import get_weather_cache_stats
+
+_stats_task: Optional[asyncio.Task] = None
+
+def collect_stats() -> dict:
+    """Текущие счетчики процесса"""
+    return {
+        "user_cache": get_user_cache_stats(),
+        "food_search": {**get_search_stats(), "cache": get_search_cache_stats()},
+        "weather_cache": get_weather_cache_stats(),
+    }
+
+async def run_stats_log(interval: float):
+    """Периодическая запись счетчиков в журнал (запускается фоновой задачей)"""
+    while True:
+        await asyncio.sleep(interval)
+        logging.info(f"Статистика: {json.dumps(collect_stats(), ensure_ascii=False)}")
+
+async def start_stats_log():
+    """Запуск периодической записи счетчиков (при запуске бота)"""
+    global _stats_task
+    interval = settings.STATS_LOG_INTERVAL
+    if interval > 0 and _stats_task is None:
+        _stats_task = asyncio.create_task(run_stats_log(interval))
+
+async def stop_stats_log():
+    """Остановка периодической записи счетчиков (при остановке бота)"""
+    global _stats_task
+    if _stats_task is not None:
+        _stats_task.cancel()
+        try:
+            await _stats_task
+        except asyncio.CancelledError:
+            pass
+        _stats_task = None
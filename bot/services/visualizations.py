@@ -1,111 +1,189 @@
-import matplotlib.pyplot as plt
-import io
-from typing import Dict, List
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, List, Optional
 
-async def create_daily_progress_chart(water_consumed: float, water_goal: float,
+from config import settings
+from database.records import DaySummary
+from services import chart_worker
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
+
+# Графики рисуются в отдельных процессах: matplotlib держит GIL и глобальное
+# состояние, и отрисовка в цикле событий задерживала ответы всем пользователям
+CHART_WORKERS = settings.CHART_WORKERS
+CHART_MAX_PENDING = settings.CHART_MAX_PENDING   # графиков в работе и в очереди
+
+CHART_CACHE_SIZE = 512   # графиков в памяти (PNG около 30-50 КБ)
+CHART_CACHE_TTL = 3600   # сек
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+
+@dataclass(slots=True)
+class Chart:
+    """Готовый график: PNG и file_id, если Telegram его уже получал"""
+    key: tuple
+    digest: str
+    png: bytes
+    file_id: Optional[str] = None
+
+
+# Последний график каждого вида на пользователя: (user_id, вид) -> Chart.
+# Совпадение digest (хэша входных данных) означает, что картинка та же
+_chart_cache = TTLCache(maxsize=CHART_CACHE_SIZE, ttl=CHART_CACHE_TTL)
+_renders = SingleFlight()
+
+def _create_executor() -> ProcessPoolExecutor:
+    # spawn: рабочие процессы не наследуют потоки и соединения родителя
+    return ProcessPoolExecutor(
+        max_workers=CHART_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=chart_worker.init_worker
+    )
+
+async def init_chart_pool():
+    """Запуск процессов отрисовки (при запуске бота).
+
+    Процессы стартуют в фоне: бот начинает принимать обновления, не дожидаясь
+    загрузки matplotlib в рабочих процессах.
+    """
+    global _executor
+    if _executor is None:
+        _executor = _create_executor()
+        for _ in range(CHART_WORKERS):
+            _executor.submit(chart_worker.warm_up)
+
+async def close_chart_pool():
+    """Остановка процессов отрисовки (при остановке бота)"""
+    global _executor
+    if _executor is not None:
+        executor, _executor = _executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+def get_chart_pool_stats() -> dict:
+    return {"workers": CHART_WORKERS, "pending": _pending, "max_pending": CHART_MAX_PENDING}
+
+def get_chart_cache_stats() -> dict:
+    return _chart_cache.stats()
+
+def invalidate_charts(user_id: int):
+    """Сброс графиков пользователя после новой записи в журнал"""
+    for kind in ("daily", "weekly"):
+        _chart_cache.invalidate((user_id, kind))
+
+def remember_chart_file_id(chart: Chart, file_id: str):
+    """Запоминание file_id отправленного графика: повторно он отправится без загрузки"""
+    chart.file_id = file_id
+    cached = _chart_cache.get(chart.key)
+    if cached is None:
+        # Запись успели вытеснить или сбросить - возвращаем
+        _chart_cache.set(chart.key, chart)
+    elif cached.digest == chart.digest:
+        cached.file_id = file_id
+
+def _digest(func: Callable[..., bytes], args: tuple) -> str:
+    return hashlib.blake2b(repr((func.__name__, args)).encode(), digest_size=16).hexdigest()
+
+def _release(_):
+    global _pending
+    _pending -= 1
+
+async def _render(func: Callable[..., bytes], *args) -> Optional[bytes]:
+    """Отрисовка в пуле процессов; None, если пул перегружен или отрисовка не удалась"""
+    global _executor, _pending
+    if _pending >= CHART_MAX_PENDING:
+        # Лучше ответить без картинки, чем копить очередь и задерживать ответ
+        logging.warning(f"Очередь графиков заполнена ({_pending}), график пропущен")
+        return None
+
+    if _executor is None:
+        _executor = _create_executor()
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, func, *args)
+    # Место в очереди освобождается, когда процесс закончил работу,
+    # даже если ожидающий обработчик отменили раньше
+    _pending += 1
+    future.add_done_callback(_release)
+
+    try:
+        return await asyncio.shield(future)
+    except BrokenProcessPool:
+        # Рабочий процесс упал - следующий график запустит новый пул
+        logging.error("Пул отрисовки графиков сломан, пересоздаем")
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+        return None
+
+async def _render_chart(key: tuple, digest: str, func: Callable[..., bytes], args: tuple) -> Optional[Chart]:
+    png = await _render(func, *args)
+    if png is None:
+        return None
+
+    chart = Chart(key=key, digest=digest, png=png)
+    _chart_cache.set(key, chart)
+    return chart
+
+async def _get_chart(user_id: int, kind: str, func: Callable[..., bytes], *args) -> Optional[Chart]:
+    """График из кэша или новая отрисовка; одинаковые запросы рисуются один раз"""
+    key = (user_id, kind)
+    digest = _digest(func, args)
+    cached = _chart_cache.get(key)
+    if cached is not None and cached.digest == digest:
+        return cached
+
+    return await _renders.do((key, digest), lambda: _render_chart(key, digest, func, args))
+
+async def create_daily_progress_chart(user_id: int, water_consumed: float, water_goal: float,
                                      calories_consumed: float, calories_burned: float,
-                                     calorie_goal: float):
-    """Создание графика дневного прогресса - возвращает BytesIO или None"""
+                                     calorie_goal: float) -> Optional[Chart]:
+    """Создание графика дневного прогресса - возвращает Chart или None"""
     try:
         # Проверяем валидность данных
         if water_goal <= 0 or calorie_goal <= 0:
             return None
-            
-        fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-        
-        # График воды
-        water_values = [water_consumed, max(0, water_goal - water_consumed)]
-        water_labels = [f'Выпито\n{water_consumed:.0f} мл', f'Осталось\n{water_values[1]:.0f} мл']
-        colors_water = ['#4CAF50', '#E0E0E0']
-        
-        axes[0].pie(water_values, labels=water_labels, colors=colors_water,
-                    autopct=lambda p: f'{p:.1f}%' if p > 0 else '',
-                    startangle=90, textprops={'fontsize': 9})
-        axes[0].set_title('Прогресс по воде', fontsize=14, fontweight='bold')
-        
-        # График калорий
-        categories = ['Потреблено', 'Сожжено', 'Цель']
-        values = [calories_consumed, calories_burned, calorie_goal]
-        colors_calories = ['#FF9800', '#2196F3', '#4CAF50']
-        
-        bars = axes[1].bar(categories, values, color=colors_calories)
-        axes[1].set_ylabel('Ккал', fontsize=12)
-        axes[1].set_title('Баланс калорий', fontsize=14, fontweight='bold')
-        
-        # Добавляем значения на столбцы
-        for bar, value in zip(bars, values):
-            height = bar.get_height()
-            axes[1].text(bar.get_x() + bar.get_width()/2., height + 10,
-                        f'{value:.0f}', ha='center', va='bottom', fontsize=9)
-        
-        plt.tight_layout()
-        
-        # Сохраняем в байты
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        plt.close(fig)
-        
-        return buf
-        
+
+        return await _get_chart(
+            user_id, "daily", chart_worker.render_daily_progress,
+            float(water_consumed), float(water_goal),
+            float(calories_consumed), float(calories_burned), float(calorie_goal)
+        )
+
     except Exception as e:
-        print(f"Ошибка создания графика: {e}")
+        logging.error(f"Ошибка создания графика: {e}")
         return None
 
-async def create_weekly_chart(weekly_data: List[Dict]):
+async def create_weekly_chart(user_id: int, weekly_data: List[DaySummary]) -> Optional[Chart]:
     """Создание недельного графика"""
     if not weekly_data:
         return None
-    
+
     try:
         dates = []
         water_values = []
         calorie_values = []
-        
+
         for d in weekly_data:
-            if d.get("date") and (d.get("water", 0) > 0 or d.get("calories", 0) > 0):
-                dates.append(d["date"].strftime("%d.%m"))
-                water_values.append(d.get("water", 0))
-                calorie_values.append(d.get("calories", 0))
-        
+            if d.date and (d.water > 0 or d.calories > 0):
+                dates.append(d.date.strftime("%d.%m"))
+                water_values.append(float(d.water))
+                calorie_values.append(float(d.calories))
+
         if len(dates) < 2:  # Нужно минимум 2 точки для графика
             return None
-        
-        fig, axes = plt.subplots(2, 1, figsize=(10, 8))
-        
-        # График воды
-        axes[0].plot(dates, water_values, marker='o', color='#4CAF50', linewidth=2)
-        axes[0].fill_between(dates, water_values, alpha=0.3, color='#4CAF50')
-        axes[0].set_title('Потребление воды за неделю', fontsize=14, fontweight='bold')
-        axes[0].set_ylabel('мл', fontsize=12)
-        axes[0].grid(True, alpha=0.3)
-        
-        # Добавляем значения на точки
-        for i, (date, value) in enumerate(zip(dates, water_values)):
-            axes[0].text(i, value + 50, f'{value:.0f}', ha='center', va='bottom', fontsize=8)
-        
-        # График калорий
-        axes[1].plot(dates, calorie_values, marker='o', color='#FF9800', linewidth=2)
-        axes[1].fill_between(dates, calorie_values, alpha=0.3, color='#FF9800')
-        axes[1].set_title('Потребление калорий за неделю', fontsize=14, fontweight='bold')
-        axes[1].set_ylabel('ккал', fontsize=12)
-        axes[1].set_xlabel('Дата', fontsize=12)
-        axes[1].grid(True, alpha=0.3)
-        
-        # Добавляем значения на точки
-        for i, (date, value) in enumerate(zip(dates, calorie_values)):
-            axes[1].text(i, value + 50, f'{value:.0f}', ha='center', va='bottom', fontsize=8)
-        
-        plt.tight_layout()
-        
-        # Сохраняем в байты
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', dpi=100, bbox_inches='tight')
-        buf.seek(0)
-        plt.close(fig)
-        
-        return buf
-        
+
+        return await _get_chart(
+            user_id, "weekly", chart_worker.render_weekly,
+            tuple(dates), tuple(water_values), tuple(calorie_values)
+        )
+
     except Exception as e:
-        print(f"Ошибка создания недельного графика: {e}")
-        return None
\ No newline at end of file
+        logging.error(f"Ошибка создания недельного графика: {e}")
+        return None
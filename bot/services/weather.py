@@ -1,8 +1,65 @@
 import aiohttp
+import asyncio
+import logging
+import re
+from typing import Optional
 from config import settings
+from services.http import get_http_session
+from utils.cache import TTLCache
+from utils.singleflight import SingleFlight
 
-async def get_current_temperature(city: str) -> float:
+DEFAULT_TEMPERATURE = 20.0
+WEATHER_TTL = 30 * 60          # температура города, сек
+NOT_FOUND_TTL = 6 * 60 * 60    # неизвестный город, сек
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+# Температура по нормализованному названию; None - город не найден
+_weather_cache = TTLCache(maxsize=5000, ttl=WEATHER_TTL)
+_inflight = SingleFlight()
+_MISSING = object()
+
+def normalize_city(city: str) -> str:
+    """Ключ города без учета регистра, пробелов, дефисов и раскладки (Москва = moskva)"""
+    name = city.casefold().translate(_TRANSLIT)
+    return " ".join(re.split(r"[\s\-_.,]+", name)).strip()
+
+async def get_current_temperature(city: str,
+                                  session: Optional[aiohttp.ClientSession] = None) -> float:
     """Получение текущей температуры для города"""
+    temperature = await fetch_temperature(city, session)
+    if temperature is None:
+        # Возвращаем среднюю температуру по умолчанию
+        return DEFAULT_TEMPERATURE
+    return temperature
+
+async def fetch_temperature(city: str,
+                            session: Optional[aiohttp.ClientSession] = None) -> Optional[float]:
+    """Температура города или None, если город неизвестен или API недоступен"""
+    key = normalize_city(city)
+
+    temperature = _weather_cache.get(key, _MISSING)
+    if temperature is _MISSING:
+        try:
+            # Одновременные запросы одного города делают один вызов API
+            temperature = await _inflight.do(
+                key, lambda: _fetch_temperature(city, key, session)
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            # Недоступный API или ответ без температуры: норма считается по температуре по умолчанию
+            logging.warning(f"Не удалось получить погоду для города {city!r}", exc_info=True)
+            return None
+
+    return temperature
+
+async def _fetch_temperature(city: str, key: str,
+                             session: Optional[aiohttp.ClientSession]) -> Optional[float]:
     url = "http://api.openweathermap.org/data/2.5/weather"
     
     params = {
@@ -12,14 +69,23 @@ async def get_current_temperature(city: str) -> float:
         "lang": "ru"
     }
     
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data["main"]["temp"]
-                else:
-                    raise Exception(f"Ошибка API: {response.status}")
-        except Exception as e:
-            # Возвращаем среднюю температуру по умолчанию
-            return 20.0
\ No newline at end of file
+    session = session or get_http_session()
+    async with session.get(url, params=params) as response:
+        if response.status == 200:
+            data = await response.json()
+            temperature = data["main"]["temp"]
+            _weather_cache.set(key, temperature)
+            return temperature
+        elif response.status == 404:
+            # Запоминаем неизвестный город, чтобы не тратить на него квоту
+            _weather_cache.set(key, None, ttl=NOT_FOUND_TTL)
+            return None
+        else:
+            raise aiohttp.ClientResponseError(
+                response.request_info, response.history,
+                status=response.status, message=f"Ошибка API: {response.status}"
+            )
+
+def get_weather_cache_stats() -> dict:
+    """Счетчики кэша погоды"""
+    return _weather_cache.stats()
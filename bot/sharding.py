@@ -0,0 +1,197 @@
+# sharding.py
+"""Обработка обновлений в нескольких процессах (WORKERS > 1).
+
+Основной процесс получает обновления (polling или webhook) и передает их
+рабочим процессам по user_id: пользователь всегда попадает в процесс
+номер hash(user_id) % WORKERS. Внутри процесса обновления одного
+пользователя обрабатываются строго по очереди, разных - параллельно,
+поэтому диалоги FSM (/set_profile, /log_food, /log_workout) не путаются.
+"""
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+from typing import Callable, Dict, List, Optional, Tuple
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from config import settings
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+from middlewares.shard_middleware import ShardRouterMiddleware
+
+SHARD_QUEUE_SIZE = 1000   # обновлений в очереди одного процесса
+CHECK_INTERVAL = 1.0      # как часто проверяем другой процесс, ожидая очередь, сек
+STOP_TIMEOUT = 30         # сколько ждем завершения процесса при остановке, сек
+
+# Фабрика диспетчера рабочего процесса: (обработчики, ограничитель)
+DispatcherFactory = Callable[[bool], Tuple[Dispatcher, ConcurrencyLimitMiddleware]]
+
+def shard_for(user_id: int, workers: int) -> int:
+    """Номер процесса, обрабатывающего обновления пользователя"""
+    return hash(user_id) % workers
+
+
+class ShardPool:
+    """Рабочие процессы и очереди обновлений к ним"""
+
+    def __init__(self, workers: int, factory: DispatcherFactory):
+        self.workers = workers
+        self.factory = factory
+        self._context = multiprocessing.get_context("spawn")
+        self._queues: List[multiprocessing.Queue] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._locks: List[asyncio.Lock] = []
+
+    async def start(self):
+        """Запуск рабочих процессов (при запуске бота)"""
+        if self._processes:
+            return
+        for index in range(self.workers):
+            self._queues.append(self._context.Queue(maxsize=SHARD_QUEUE_SIZE))
+            self._processes.append(self._spawn(index))
+            self._locks.append(asyncio.Lock())
+        logging.info(f"Запущено рабочих процессов: {self.workers}")
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        process = self._context.Process(
+            target=run_worker, args=(index, self._queues[index], self.factory),
+            # Не daemon: рабочему процессу нужен свой пул отрисовки графиков
+            name=f"bot-worker-{index}"
+        )
+        process.start()
+        return process
+
+    def _ensure_alive(self, index: int):
+        # Упавший процесс перезапускается; его очередь сохраняется
+        if not self._processes[index].is_alive():
+            logging.error(f"Рабочий процесс {index} завершился "
+                          f"(код {self._processes[index].exitcode}), перезапускаем")
+            self._processes[index] = self._spawn(index)
+
+    async def dispatch(self, user_id: int, update: Update):
+        """Передача обновления процессу пользователя"""
+        index = shard_for(user_id, self.workers)
+        payload = (user_id, update.model_dump_json(exclude_unset=True, by_alias=True))
+        # Блокировка сохраняет порядок, если очередь процесса заполнена
+        # и приходится ждать места
+        async with self._locks[index]:
+            self._ensure_alive(index)
+            try:
+                self._queues[index].put_nowait(payload)
+                return
+            except queue.Full:
+                pass
+            while True:
+                try:
+                    await asyncio.to_thread(self._queues[index].put, payload, True, CHECK_INTERVAL)
+                    return
+                except queue.Full:
+                    self._ensure_alive(index)
+
+    async def stop(self):
+        """Остановка процессов после обработки уже переданных обновлений"""
+        for index, updates in enumerate(self._queues):
+            try:
+                await asyncio.to_thread(updates.put, None, True, STOP_TIMEOUT)
+            except queue.Full:
+                logging.warning(f"Очередь процесса {index} не освобождается")
+        for process in self._processes:
+            await asyncio.to_thread(process.join, STOP_TIMEOUT)
+            if process.is_alive():
+                logging.warning(f"Процесс {process.name} не завершился, останавливаем")
+                process.terminate()
+        self._queues, self._processes, self._locks = [], [], []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+        }
+
+
+def create_front_dispatcher(shards: ShardPool) -> Tuple[Dispatcher, ConcurrencyLimitMiddleware]:
+    """Диспетчер основного процесса: только распределяет обновления.
+
+    Обработчиков в нем нет, поэтому Telegram присылает обновления
+    всех типов по умолчанию.
+    """
+    dp = Dispatcher()
+    dp.startup.register(shards.start)
+    dp.shutdown.register(shards.stop)
+
+    limiter = ConcurrencyLimitMiddleware(settings.MAX_CONCURRENT_UPDATES)
+    dp.update.outer_middleware(limiter)
+    dp.update.outer_middleware(ShardRouterMiddleware(shards))
+    return dp, limiter
+
+# --- Рабочий процесс ---
+
+def run_worker(index: int, updates: multiprocessing.Queue, factory: DispatcherFactory):
+    """Точка входа рабочего процесса"""
+    # Останавливает основной процесс, отправляя None в очередь
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from app import setup_logging
+    setup_logging()
+    asyncio.run(_serve(index, updates, factory))
+
+def _next_update(updates: multiprocessing.Queue) -> Optional[Tuple[int, str]]:
+    """Следующее обновление; None - пора останавливаться"""
+    while True:
+        try:
+            return updates.get(timeout=CHECK_INTERVAL)
+        except queue.Empty:
+            # Основной процесс завершился, не успев остановить рабочие
+            parent = multiprocessing.parent_process()
+            if parent is not None and not parent.is_alive():
+                return None
+
+async def _serve(index: int, updates: multiprocessing.Queue, factory: DispatcherFactory):
+    bot = Bot(token=settings.BOT_TOKEN)
+    # Фоновые задачи (пересчет норм воды) - только в первом процессе
+    dp, _ = factory(index == 0)
+    await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+    logging.info(f"Рабочий процесс {index} запущен")
+
+    loop = asyncio.get_running_loop()
+    # user_id -> (блокировка, число обновлений в работе)
+    users: Dict[int, List] = {}
+    tasks = set()
+    # Очередь читается, только пока в работе меньше MAX_CONCURRENT_UPDATES
+    # обновлений: иначе всплеск копился бы задачами в памяти процесса,
+    # а ограниченная очередь (SHARD_QUEUE_SIZE) не сдерживала бы основной
+    slots = asyncio.Semaphore(settings.MAX_CONCURRENT_UPDATES)
+
+    async def handle(user_id: int, payload: str):
+        entry = users.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                update = Update.model_validate_json(payload, context={"bot": bot})
+                await dp.feed_update(bot, update)
+        except Exception as e:
+            logging.error(f"Ошибка обработки обновления в процессе {index}: {e}")
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del users[user_id]
+
+    try:
+        while True:
+            await slots.acquire()
+            item = await loop.run_in_executor(None, _next_update, updates)
+            if item is None:
+                break
+            # Задачи создаются в порядке поступления, а Lock будит
+            # ожидающих по очереди - порядок обновлений пользователя сохраняется
+            task = asyncio.create_task(handle(*item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await bot.session.close()
+        logging.info(f"Рабочий процесс {index} остановлен")
@@ -0,0 +1,72 @@
+# utils/circuit_breaker.py
+import logging
+import time
+
+
+class CircuitBreaker:
+    """Предохранитель для внешнего сервиса.
+
+    После failure_threshold ошибок подряд запросы к сервису не выполняются
+    (состояние open). Через recovery_timeout секунд пропускается один
+    пробный запрос (half_open): успех закрывает предохранитель, ошибка
+    снова открывает его.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._set_state(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != self.OPEN:
+                self._set_state(self.OPEN)
+
+    def _set_state(self, state: str):
+        logging.warning(f"Предохранитель {self.name}: {self.state} -> {state}")
+        self.state = state
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,31 @@
+# utils/singleflight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Склейка одновременных одинаковых запросов.
+
+    Пока запрос с ключом key выполняется, остальные вызовы с тем же ключом
+    не запускают свой, а ждут результата первого.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+
+        # Отмена одного ожидающего не должна отменять запрос для остальных
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
@@ -0,0 +1,83 @@
+# webhook.py
+"""Прием обновлений через webhook (BOT_MODE=webhook).
+
+Telegram присылает обновления POST-запросами на WEBHOOK_URL + WEBHOOK_PATH
+с заголовком X-Telegram-Bot-Api-Secret-Token. Несколько экземпляров бота
+могут стоять за балансировщиком, а обновления, пришедшие во время
+перезапуска, Telegram доставит повторно, а не потеряет.
+"""
+import asyncio
+import logging
+import re
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from config import settings
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+from services.stats import collect_stats
+
+# Допустимые символы секретного токена по документации Telegram Bot API
+_SECRET_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
+
+def webhook_url() -> str:
+    if not settings.WEBHOOK_URL:
+        raise ValueError("Для режима webhook задайте WEBHOOK_URL (публичный адрес бота)")
+    return settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH
+
+def webhook_secret() -> str:
+    # Без секрета адрес webhook публичен, и поддельные обновления принимались бы от кого угодно
+    if not settings.WEBHOOK_SECRET:
+        raise ValueError("Для режима webhook задайте WEBHOOK_SECRET (секретный токен запросов Telegram)")
+    if not _SECRET_PATTERN.fullmatch(settings.WEBHOOK_SECRET):
+        raise ValueError("WEBHOOK_SECRET: от 1 до 256 символов A-Z, a-z, 0-9, _ и -")
+    return settings.WEBHOOK_SECRET
+
+async def register_webhook(bot: Bot, dispatcher: Dispatcher):
+    """Регистрация webhook в Telegram (при запуске бота)"""
+    await bot.set_webhook(
+        url=webhook_url(),
+        secret_token=webhook_secret(),
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        drop_pending_updates=settings.DROP_PENDING_UPDATES
+    )
+    logging.info(f"Webhook зарегистрирован: {webhook_url()}")
+
+def create_app(bot: Bot, dp: Dispatcher, limiter: ConcurrencyLimitMiddleware) -> web.Application:
+    """aiohttp-приложение с обработчиком обновлений и проверкой здоровья"""
+    app = web.Application()
+
+    # Запрос без верного секретного токена получает 401 и не доходит до диспетчера
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=webhook_secret()
+    ).register(app, path=settings.WEBHOOK_PATH)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "updates": limiter.stats(), **collect_stats()})
+
+    app.router.add_get("/health", health)
+
+    # Хуки dp.startup / dp.shutdown вызываются при запуске и остановке сервера
+    setup_application(app, dp, bot=bot)
+    return app
+
+async def run_webhook(bot: Bot, dp: Dispatcher, limiter: ConcurrencyLimitMiddleware):
+    """Запуск HTTP-сервера webhook; работает до отмены"""
+    # Без адреса или секрета сервер не запускается
+    webhook_url()
+    webhook_secret()
+    dp.startup.register(register_webhook)
+
+    runner = web.AppRunner(create_app(bot, dp, limiter))
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT)
+    await site.start()
+    logging.info(f"Webhook-сервер слушает {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        # Webhook не удаляем: его продолжают обслуживать другие экземпляры
+        await runner.cleanup()
+        await bot.session.close()
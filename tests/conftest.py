@@ -0,0 +1,26 @@
+# tests/conftest.py
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+# Настройки читаются при импорте config: тестам не нужны настоящие ключи,
+# а база по умолчанию - временный файл, а не fitness.db в рабочем каталоге
+os.environ.setdefault("BOT_TOKEN", "123456:TEST")
+os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='fitness-bot-tests-')}/fitness.db"
+)
+
+from database.connection import connect  # noqa: E402
+from database.migrations import migrate  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path) -> sqlite3.Connection:
+    """Свежая база со всеми миграциями"""
+    conn = connect(str(tmp_path / "fitness.db"))
+    migrate(conn)
+    yield conn
+    conn.close()
@@ -0,0 +1,89 @@
+# tests/test_calculations.py
+"""Пакетные расчеты NumPy побитово совпадают со скалярными функциями."""
+import random
+
+import numpy as np
+import pytest
+
+from services.calculations import (
+    CALORIE_ACTIVITY_MULTIPLIERS, MET_VALUES,
+    calculate_calorie_goal, calculate_goals, calculate_water_goal, calculate_workout_calories,
+    calculate_calorie_goal_batch, calculate_goals_batch, calculate_water_goal_batch,
+    calculate_workout_calories_batch,
+)
+
+SAMPLES = 20000
+SEEDS = (17, 2024, 99991)
+
+# Неизвестные значения проверяют значения по умолчанию
+ACTIVITY_LEVELS = [*CALORIE_ACTIVITY_MULTIPLIERS, "unknown", ""]
+GENDERS = ["male", "female", "other"]
+WORKOUT_TYPES = [*MET_VALUES, "Теннис"]
+# Границы температурных надбавок и числа рядом с ними
+TEMPERATURES = [25, 30, 25.0000001, 24.9999999, 30.0000001, -40, 45]
+
+
+def _bits(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64).view(np.uint64)
+
+
+def _users(seed: int, count: int = SAMPLES) -> dict:
+    rng = random.Random(seed)
+
+    def number(low, high):
+        # Целые и дробные значения, как приходят из профиля
+        value = rng.uniform(low, high)
+        return round(value) if rng.random() < 0.3 else value
+
+    return {
+        "weights": [number(30, 250) for _ in range(count)],
+        "heights": [number(120, 230) for _ in range(count)],
+        "ages": [rng.randint(10, 100) for _ in range(count)],
+        "genders": [rng.choice(GENDERS) for _ in range(count)],
+        "activity_levels": [rng.choice(ACTIVITY_LEVELS) for _ in range(count)],
+        "temperatures": [rng.choice(TEMPERATURES) if rng.random() < 0.2 else number(-40, 45)
+                         for _ in range(count)],
+    }
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_water_goal_batch_is_bit_identical(seed):
+    users = _users(seed)
+    expected = [calculate_water_goal(w, a, t) for w, a, t in
+                zip(users["weights"], users["activity_levels"], users["temperatures"])]
+    actual = calculate_water_goal_batch(users["weights"], users["activity_levels"], users["temperatures"])
+    assert np.array_equal(_bits(actual), _bits(expected))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_calorie_goal_batch_is_bit_identical(seed):
+    users = _users(seed)
+    expected = [calculate_calorie_goal(w, h, a, g, l) for w, h, a, g, l in
+                zip(users["weights"], users["heights"], users["ages"],
+                    users["genders"], users["activity_levels"])]
+    actual = calculate_calorie_goal_batch(users["weights"], users["heights"], users["ages"],
+                                          users["genders"], users["activity_levels"])
+    assert np.array_equal(_bits(actual), _bits(expected))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_workout_calories_batch_is_bit_identical(seed):
+    rng = random.Random(seed)
+    workout_types = [rng.choice(WORKOUT_TYPES) for _ in range(SAMPLES)]
+    durations = [rng.randint(1, 300) for _ in range(SAMPLES)]
+    weights = [rng.uniform(30, 250) for _ in range(SAMPLES)]
+
+    expected = [calculate_workout_calories(t, d, w) for t, d, w in zip(workout_types, durations, weights)]
+    actual = calculate_workout_calories_batch(workout_types, durations, weights)
+    assert np.array_equal(_bits(actual), _bits(expected))
+
+
+def test_goals_batch_matches_calculate_goals():
+    users = _users(SEEDS[0], count=1000)
+    batch = calculate_goals_batch(users["weights"], users["heights"], users["ages"],
+                                  users["genders"], users["activity_levels"], users["temperatures"])
+    for i, args in enumerate(zip(users["weights"], users["heights"], users["ages"], users["genders"],
+                                 users["activity_levels"], users["temperatures"])):
+        goals = calculate_goals(*args)
+        assert _bits(batch["water_goal"][i]) == _bits(goals["water_goal"])
+        assert _bits(batch["calorie_goal"][i]) == _bits(goals["calorie_goal"])
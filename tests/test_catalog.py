@@ -0,0 +1,44 @@
+# tests/test_catalog.py
+"""Поиск в локальном каталоге продуктов (начальное наполнение миграции)."""
+import pytest
+
+from database.catalog import search_catalog
+
+
+def names(db, query):
+    return [product["name"] for product in search_catalog(db, query)]
+
+
+@pytest.mark.parametrize("query", ["молоко", "шоколад", "ананас", "курага"])
+def test_shared_trigram_is_not_a_match(db, query):
+    # "молоко" и "шоколад" делят с "яблоко" только "око", "ананас" с "банан" - "ана"
+    assert names(db, query) == []
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("банан", ["Банан"]),
+    ("кур груд", ["Куриная грудка"]),
+    ("Apple", ["Яблоко"]),
+])
+def test_prefix_search(db, query, expected):
+    assert names(db, query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("яблако", "Яблоко"),
+    ("бананн", "Банан"),
+    ("овсянкаа", "Овсянка"),
+    ("грутка", "Куриная грудка"),
+])
+def test_single_typo_is_found(db, query, expected):
+    assert names(db, query)[:1] == [expected]
+
+
+def test_fuzzy_search_needs_one_long_enough_word(db):
+    assert names(db, "куринная грутка") == []
+    assert names(db, "бнн") == []
+
+
+def test_fuzzy_search_can_be_disabled(db):
+    assert [p["name"] for p in search_catalog(db, "яблако", fuzzy=False)] == []
+    assert [p["name"] for p in search_catalog(db, "ябл", fuzzy=False)] == ["Яблоко"]
@@ -0,0 +1,161 @@
+# tests/test_crud.py
+"""Слой данных (database/crud.py) на базе из DATABASE_URL.
+
+Проверяется поведение, на которое опираются обработчики: каждый тест
+работает через пул соединений и очередь записи, как бот.
+"""
+import asyncio
+import time
+
+import pytest
+
+from database import crud
+from database.connection import connect, sqlite_path_from_url
+from database.migrations import migrate
+from database.pool import ConnectionPool
+from database.write_queue import WriteBehindQueue
+from utils.cache import TTLCache
+
+PROFILE = {
+    "user_id": 42, "username": "runner", "weight": 70.0, "height": 175.0, "age": 30,
+    "gender": "male", "activity_level": "moderate", "city": "Москва",
+    "calorie_goal": 2500.0, "water_goal": 2400.0,
+}
+
+
+@pytest.fixture(params=["sqlite:///{tmp}/fitness.db", "sqlite+aiosqlite:///{tmp}/fitness.db"])
+def run(request, tmp_path, monkeypatch):
+    """Выполнение сценария на пуле и очереди записи базы из DATABASE_URL"""
+    db_path = sqlite_path_from_url(request.param.format(tmp=tmp_path))
+    conn = connect(db_path)
+    migrate(conn)
+    conn.close()
+
+    def run_scenario(scenario):
+        async def with_pool():
+            pool = ConnectionPool(db_path, size=2)
+            monkeypatch.setattr(crud, "pool", pool)
+            monkeypatch.setattr(crud, "write_queue", WriteBehindQueue(pool))
+            monkeypatch.setattr(crud, "user_cache", TTLCache())
+            try:
+                return await scenario()
+            finally:
+                await crud.write_queue.close()
+                await pool.close()
+        return asyncio.run(with_pool())
+
+    return run_scenario
+
+
+@pytest.mark.parametrize("url", [
+    "sqlite:///:memory:", "sqlite://", "sqlite:///", "sqlite:///file::memory:?cache=shared",
+])
+def test_in_memory_database_is_rejected(url):
+    with pytest.raises(ValueError, match="в памяти"):
+        sqlite_path_from_url(url)
+
+
+@pytest.mark.parametrize("url", ["postgresql+asyncpg://bot@localhost/fitness", "fitness.db"])
+def test_other_databases_are_rejected(url):
+    with pytest.raises(ValueError, match="Неподдерживаемый DATABASE_URL"):
+        sqlite_path_from_url(url)
+
+
+def test_user_create_update_and_read(run):
+    async def scenario():
+        missing = await crud.get_user(PROFILE["user_id"])
+        await crud.create_or_update_user(PROFILE)
+        created = await crud.get_user(PROFILE["user_id"])
+        await crud.create_or_update_user({"user_id": PROFILE["user_id"], "weight": 68.5})
+        return missing, created, await crud.get_user(PROFILE["user_id"])
+
+    missing, created, updated = run(scenario)
+    assert missing is None
+    assert {key: getattr(created, key) for key in PROFILE} == PROFILE
+    assert updated.weight == 68.5
+    assert updated.city == PROFILE["city"]
+
+
+def test_logs_are_visible_right_after_write(run):
+    async def scenario():
+        user_id = PROFILE["user_id"]
+        await crud.create_or_update_user(PROFILE)
+        await asyncio.gather(*(crud.add_water_log(user_id, amount) for amount in (250, 500)))
+        await crud.add_food_log(user_id, "Овсянка", 350.0, 100.0, protein=12.0, carbs=60.0, fat=6.0)
+        await crud.add_workout_log(user_id, "бег", 30, 300.0)
+        return (
+            await crud.get_water_today(user_id),
+            await crud.get_calories_today(user_id),
+            await crud.get_burned_calories_today(user_id),
+            await crud.get_last_workout(user_id),
+            await crud.get_daily_snapshot(user_id),
+            await crud.get_weekly_summary(user_id),
+        )
+
+    water, calories, burned, workout, snapshot, week = run(scenario)
+    assert (water, calories, burned) == (750.0, 350.0, 300.0)
+    assert (workout.workout_type, workout.duration, workout.calories_burned) == ("бег", 30, 300.0)
+    assert snapshot.user.user_id == PROFILE["user_id"]
+    assert (snapshot.water_today, snapshot.protein_today, snapshot.fat_today) == (750.0, 12.0, 6.0)
+    assert snapshot.last_workout == workout
+    assert len(week) == 7
+    assert (week[-1].water, week[-1].calories, week[-1].workouts) == (750.0, 350.0, 1)
+
+
+def test_snapshot_of_unknown_user(run):
+    async def scenario():
+        return await crud.get_daily_snapshot(1), await crud.get_last_workout(1)
+
+    assert run(scenario) == (None, None)
+
+
+def test_water_goal_batches(run):
+    async def scenario():
+        for user_id, city in ((1, "Москва"), (2, "Казань"), (3, None)):
+            await crud.create_or_update_user({**PROFILE, "user_id": user_id, "city": city})
+        cities = sorted(await crud.get_user_cities())
+        batch = await crud.get_users_batch(0, 10)
+        updated = await crud.update_water_goals([(3000.0, *row) for row in batch])
+        return cities, batch, updated, await crud.get_user(1)
+
+    cities, batch, updated, user = run(scenario)
+    assert cities == ["Казань", "Москва"]
+    assert [row[0] for row in batch] == [1, 2]
+    assert updated == 2
+    assert user.water_goal == 3000.0
+
+
+def test_food_search_cache(run):
+    products = [{"code": "1", "name": "Кефир", "calories": 40}]
+
+    async def scenario():
+        missing = await crud.get_cached_food_search("кефир")
+        await crud.save_food_search("кефир", products, 100.0)
+        await crud.save_food_search("йогурт", products, 200.0)
+        evicted = await crud.evict_food_search_cache(1)
+        return missing, evicted, await crud.get_cached_food_search("йогурт")
+
+    assert run(scenario) == (None, 1, (products, 200.0))
+
+
+def test_product_cache(run):
+    product = {"code": "4600000000001", "name": "Кефир 1%", "calories": 40}
+
+    async def scenario():
+        now = time.time()
+        await crud.save_cached_products([product], now)
+        found = await crud.get_cached_products([product["code"], "missing"])
+        evicted = await crud.evict_cached_products(now + 1)
+        return found, evicted, await crud.get_cached_products([product["code"]])
+
+    assert run(scenario) == ({product["code"]: product}, 1, {})
+
+
+def test_catalog_search(run):
+    async def scenario():
+        found = await crud.search_food_catalog("яблоко", limit=3)
+        return found, await crud.get_catalog_products([found[0]["code"]])
+
+    found, by_code = run(scenario)
+    assert found and found[0]["name"] == "Яблоко"
+    assert by_code == {found[0]["code"]: found[0]}
@@ -0,0 +1,120 @@
+# tests/test_food_session.py
+"""Диалог /log_food: в данных FSM только коды продуктов, а сами продукты - в кэше."""
+import asyncio
+import json
+import tracemalloc
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from database import crud
+from database.pool import ConnectionPool
+from database.write_queue import WriteBehindQueue
+from handlers import food
+from services import nutrition
+
+SESSIONS = 2000
+# Данных FSM на один диалог после поиска: 5 кодов, около 100 байт JSON
+PAYLOAD_BUDGET = 200
+# Память одного брошенного диалога в MemoryStorage вместе с ключом и состоянием:
+# сейчас около 1,6 КБ, с полными результатами поиска (10 продуктов) было около 3,4 КБ
+SESSION_MEMORY_BUDGET = 2048
+
+RESULTS = [
+    {
+        "code": f"46000000000{i:02d}",
+        "name": f"Йогурт питьевой клубника-банан 2,5% жирности, бутылка 270 г, вариант {i}",
+        "calories": 83.5, "protein": 2.8, "carbs": 12.4, "fat": 2.5,
+    }
+    for i in range(10)
+]
+
+
+class FakeMessage:
+    def __init__(self, text: str):
+        self.text = text
+        self.answers = []
+
+    async def answer(self, text: str, **kwargs):
+        self.answers.append(text)
+
+
+@pytest.fixture
+def no_product_writes(monkeypatch):
+    async def search_food(query):
+        return [dict(product) for product in RESULTS]
+
+    async def save_cached_products(products, cached_at):
+        pass
+
+    monkeypatch.setattr(food, "search_food", search_food)
+    monkeypatch.setattr(nutrition, "save_cached_products", save_cached_products)
+    nutrition._product_cache.clear()
+
+
+async def _search(storage: MemoryStorage, user_id: int):
+    state = FSMContext(storage, StorageKey(bot_id=1, chat_id=user_id, user_id=user_id))
+    await state.set_state(food.FoodStates.searching)
+    await food.process_food_search(FakeMessage("йогурт"), state)
+    return state
+
+
+def test_session_keeps_only_product_codes(no_product_writes):
+    async def scenario():
+        state = await _search(MemoryStorage(), 1)
+        return await state.get_state(), await state.get_data()
+
+    state, data = asyncio.run(scenario())
+    assert state == food.FoodStates.selecting.state
+    assert data == {"product_codes": [product["code"] for product in RESULTS[:5]]}
+
+    payload = len(json.dumps(data, ensure_ascii=False).encode())
+    full_results = len(json.dumps(RESULTS, ensure_ascii=False).encode())
+    assert payload < PAYLOAD_BUDGET
+    assert payload * 10 < full_results
+
+
+def test_memory_per_session(no_product_writes):
+    async def scenario():
+        storage = MemoryStorage()
+        # Первый поиск заполняет общий кэш продуктов - он не растет с числом диалогов
+        await _search(storage, 0)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for user_id in range(1, SESSIONS + 1):
+            await _search(storage, user_id)
+        # Фоновая запись продуктов в базу завершается и не держит память
+        await asyncio.gather(*nutrition._background_tasks)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        stats = after.compare_to(before, "filename")
+        return sum(stat.size_diff for stat in stats) / SESSIONS
+
+    per_session = asyncio.run(scenario())
+    assert per_session < SESSION_MEMORY_BUDGET, f"{per_session:.0f} байт на диалог"
+
+
+def test_shown_products_survive_restart(db, tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "fitness.db"), size=2)
+    monkeypatch.setattr(crud, "pool", pool)
+    monkeypatch.setattr(crud, "write_queue", WriteBehindQueue(pool))
+
+    async def scenario():
+        codes = nutrition.remember_products(RESULTS[:5])
+        await asyncio.gather(*nutrition._background_tasks)
+
+        # Перезапуск: в памяти процесса продуктов нет
+        nutrition._product_cache.clear()
+        products = [await nutrition.get_product(code) for code in codes]
+
+        await crud.write_queue.close()
+        await pool.close()
+        return products
+
+    assert asyncio.run(scenario()) == RESULTS[:5]
+    # Каталог остается только за импортом и начальным наполнением
+    assert db.execute("SELECT COUNT(*) FROM food_catalog WHERE code LIKE '46%'").fetchone()[0] == 0
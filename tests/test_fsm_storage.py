@@ -0,0 +1,77 @@
+# tests/test_fsm_storage.py
+"""SQLiteStorage: отложенная запись состояний FSM."""
+import asyncio
+import time
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from database import fsm_storage
+from database.fsm_storage import SQLiteStorage
+from database.pool import ConnectionPool
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+@pytest.fixture
+def db_path(db, tmp_path):
+    return str(tmp_path / "fitness.db")
+
+
+def _stored_state(db, storage: SQLiteStorage):
+    row = db.execute("SELECT state FROM fsm_storage WHERE key = ?",
+                     (storage.key_builder.build(KEY),)).fetchone()
+    return row[0] if row else None
+
+
+def test_slow_flush_does_not_lose_later_state(db, db_path, monkeypatch):
+    save_entries = fsm_storage._save_entries
+    calls = []
+
+    def slow_save_entries(conn, entries, cleanup):
+        # Первая запись дольше FLUSH_DELAY: медленный диск или ожидание busy_timeout
+        calls.append([state for _, state, _, _ in entries])
+        if len(calls) == 1:
+            time.sleep(0.3)
+        save_entries(conn, entries, cleanup)
+
+    monkeypatch.setattr(fsm_storage, "_save_entries", slow_save_entries)
+
+    async def scenario():
+        pool = ConnectionPool(db_path, size=2)
+        storage = SQLiteStorage(db_pool=pool, flush_delay=0.01)
+        await storage.set_state(KEY, "S1")
+        await asyncio.sleep(0.05)          # первая запись уже идет
+        await storage.set_state(KEY, "S2")
+        assert await storage.get_state(KEY) == "S2"
+        await asyncio.sleep(0.1)           # вторая запись запланирована во время первой
+        assert await storage.get_state(KEY) == "S2"
+        await storage.close()
+        await pool.close()
+        return storage
+
+    storage = asyncio.run(scenario())
+    assert calls == [["S1"], ["S2"]]
+    assert _stored_state(db, storage) == "S2"
+
+
+def test_state_and_data_round_trip(db, db_path):
+    async def scenario():
+        pool = ConnectionPool(db_path, size=1)
+        storage = SQLiteStorage(db_pool=pool, flush_delay=0.01)
+        await storage.update_data(KEY, {"product_codes": ["123"]})
+        await storage.set_state(KEY, "FoodLog:choosing")
+        await storage.close()
+
+        # Новое хранилище (перезапуск бота) читает записанное из базы
+        restarted = SQLiteStorage(db_pool=pool)
+        result = await restarted.get_state(KEY), await restarted.get_data(KEY)
+
+        await restarted.set_state(KEY, None)
+        await restarted.set_data(KEY, {})
+        await restarted.close()
+        await pool.close()
+        return result
+
+    assert asyncio.run(scenario()) == ("FoodLog:choosing", {"product_codes": ["123"]})
+    assert db.execute("SELECT COUNT(*) FROM fsm_storage").fetchone()[0] == 0
@@ -0,0 +1,55 @@
+# tests/test_goal_refresh.py
+"""Фоновый пересчет норм воды не перезаписывает профиль, сохраненный во время пересчета."""
+import asyncio
+
+import pytest
+
+from database import crud
+from database.pool import ConnectionPool
+from services import goal_refresh
+
+HOT = 35.0
+
+
+@pytest.fixture
+def crud_pool(db, tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "fitness.db"), size=2)
+    monkeypatch.setattr(crud, "pool", pool)
+
+    async def fetch_temperature(city):
+        return HOT
+
+    monkeypatch.setattr(goal_refresh, "fetch_temperature", fetch_temperature)
+    return pool
+
+
+def _profile(user_id: int, weight: float) -> dict:
+    return {"user_id": user_id, "weight": weight, "activity_level": "moderate",
+            "city": "Москва", "water_goal": 2000.0}
+
+
+def test_profile_saved_during_refresh_wins(db, crud_pool, monkeypatch):
+    get_users_batch = crud.get_users_batch
+    saved = _profile(1, 95.0) | {"water_goal": 3400.0}
+
+    async def batch_then_profile_save(after_user_id, limit):
+        users = await get_users_batch(after_user_id, limit)
+        if users:
+            # Пользователь сохраняет /set_profile между чтением пачки и записью норм
+            await crud.create_or_update_user(saved)
+        return users
+
+    monkeypatch.setattr(goal_refresh, "get_users_batch", batch_then_profile_save)
+
+    async def scenario():
+        await crud.create_or_update_user(_profile(1, 60.0))
+        await crud.create_or_update_user(_profile(2, 70.0))
+        updated = await goal_refresh.refresh_water_goals()
+        users = [await crud.get_user(user_id) for user_id in (1, 2)]
+        await crud_pool.close()
+        return updated, users
+
+    updated, (changed, untouched) = asyncio.run(scenario())
+    assert updated == 1
+    assert (changed.weight, changed.water_goal) == (95.0, 3400.0)
+    assert untouched.water_goal != 2000.0
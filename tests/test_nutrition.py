@@ -0,0 +1,66 @@
+# tests/test_nutrition.py
+"""Поиск продуктов: гонка каталога с OpenFoodFacts и предохранитель."""
+import asyncio
+
+import pytest
+
+from services import nutrition
+from utils.circuit_breaker import CircuitBreaker
+
+REMOTE = [{"code": "4600000000001", "name": "Молоко 3,2%", "calories": 60}]
+FUZZY = [{"code": "local:apple", "name": "Яблоко", "calories": 52}]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Каталог, который знает только нечеткое совпадение и отвечает мгновенно"""
+    calls = []
+
+    async def search_food_catalog(query, limit=10, fuzzy=True):
+        calls.append(fuzzy)
+        return FUZZY if fuzzy else []
+
+    monkeypatch.setattr(nutrition, "search_food_catalog", search_food_catalog)
+    return calls
+
+
+def _remote(products, delay=0.05):
+    async def search_remote(query, session):
+        await asyncio.sleep(delay)
+        return products
+    return search_remote
+
+
+@pytest.mark.parametrize("race", [True, False])
+def test_fuzzy_match_does_not_beat_api(monkeypatch, catalog, race):
+    monkeypatch.setattr(nutrition.settings, "FOOD_SEARCH_RACE", race)
+    monkeypatch.setattr(nutrition, "_search_remote", _remote(REMOTE))
+
+    assert asyncio.run(nutrition.search_food("молоко")) == REMOTE
+    assert True not in catalog
+
+
+@pytest.mark.parametrize("race", [True, False])
+def test_fuzzy_match_when_api_finds_nothing(monkeypatch, catalog, race):
+    monkeypatch.setattr(nutrition.settings, "FOOD_SEARCH_RACE", race)
+    monkeypatch.setattr(nutrition, "_search_remote", _remote([]))
+
+    assert asyncio.run(nutrition.search_food("яблако")) == FUZZY
+
+
+@pytest.mark.parametrize("error", [AttributeError("'NoneType' object has no attribute 'get'"),
+                                   asyncio.TimeoutError()])
+def test_half_open_probe_is_released_on_any_error(monkeypatch, error):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    monkeypatch.setattr(nutrition, "_breaker", breaker)
+
+    async def fetch_products(query, session):
+        raise error
+
+    monkeypatch.setattr(nutrition, "_fetch_products", fetch_products)
+    breaker.record_failure()
+
+    # Пробный запрос падает - предохранитель снова открыт, но следующий пробный пропускается
+    assert asyncio.run(nutrition._refresh_search("молоко", "молоко", None)) is None
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,79 @@
+# tests/test_sharding.py
+"""Рабочий процесс шардинга: порядок обновлений и ограничение чтения очереди.
+
+_serve запускается в текущем процессе с обычной queue.Queue вместо
+очереди multiprocessing - интерфейс get(timeout=...) у них одинаковый.
+"""
+import asyncio
+import queue
+import threading
+import time
+
+from aiogram import Dispatcher, Router
+from aiogram.types import Message, Update
+
+import sharding
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+
+LIMIT = 4
+USERS = 5
+PER_USER = 20
+
+
+def _payload(update_id: int, user_id: int) -> str:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": str(update_id),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+        },
+    }).model_dump_json(exclude_unset=True, by_alias=True)
+
+
+def test_worker_reads_no_more_than_it_handles(monkeypatch):
+    monkeypatch.setattr(sharding.settings, "MAX_CONCURRENT_UPDATES", LIMIT)
+    updates = queue.Queue()
+    release = threading.Event()
+    handled = []
+    in_flight = []
+
+    def factory(background_jobs: bool):
+        router = Router()
+
+        @router.message()
+        async def record(message: Message):
+            in_flight.append(message.message_id)
+            # Обработчики стоят, пока тест не проверит очередь
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            handled.append((message.from_user.id, message.message_id))
+
+        dp = Dispatcher()
+        dp.include_router(router)
+        return dp, ConcurrencyLimitMiddleware(100)
+
+    update_id = 0
+    for _ in range(PER_USER):
+        for user_id in range(1, USERS + 1):
+            update_id += 1
+            updates.put((user_id, _payload(update_id, user_id)))
+    updates.put(None)
+    total = USERS * PER_USER
+
+    worker = threading.Thread(target=asyncio.run, args=(sharding._serve(0, updates, factory),))
+    worker.start()
+    try:
+        time.sleep(0.5)
+        # В работе не больше LIMIT обновлений, остальные ждут в очереди
+        assert len(in_flight) <= LIMIT
+        assert updates.qsize() >= total + 1 - LIMIT
+    finally:
+        release.set()
+        worker.join(timeout=30)
+    assert not worker.is_alive()
+
+    assert len(handled) == total
+    for user_id in range(1, USERS + 1):
+        ids = [message_id for uid, message_id in handled if uid == user_id]
+        assert ids == sorted(ids)
@@ -0,0 +1,80 @@
+# tests/test_startup.py
+"""Бюджет холодного старта: что и за сколько импортирует bot/main.py.
+
+Импорт измеряется в отдельном процессе через python -X importtime, как при
+настоящем запуске бота. Процессы пула отрисовки тоже выполняют main.py
+(spawn загружает его как __mp_main__) - им бот не нужен.
+"""
+import ast
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BOT_DIR = Path(__file__).resolve().parents[1] / "bot"
+
+# Модули бота (без зависимостей): сейчас около 50 мс
+OWN_MODULES_BUDGET_MS = 250
+# Весь импорт main; большую часть занимает aiogram.types (около 2 с)
+TOTAL_BUDGET_MS = 6000
+# Нужны только процессам отрисовки и пакетным расчетам
+HEAVY_MODULES = ("numpy", "matplotlib")
+# Что main() импортирует при запуске бота
+STARTUP_IMPORTS = "import main, app, database, sharding, webhook"
+# Процессу отрисовки нужны только matplotlib и services.chart_worker
+BOT_ONLY_PACKAGES = ("aiogram", "app", "config", "sharding", "webhook",
+                     "database", "handlers", "keyboards", "middlewares")
+# Запуск пула отрисовки из процесса, запущенного как python main.py
+CHART_WORKER_MODULES = """
+import __main__
+__main__.__file__ = "main.py"
+from services import visualizations
+executor = visualizations._create_executor()
+print(executor.submit(eval, "sorted(__import__('sys').modules)").result())
+executor.shutdown()
+"""
+OWN_PACKAGES = {
+    "main", "app", "config", "sharding", "webhook",
+    "database", "handlers", "keyboards", "middlewares", "services", "utils",
+}
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "BOT_TOKEN": "123456:TEST", "OPENWEATHER_API_KEY": "test"}
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=BOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_times() -> dict:
+    """Собственное время импорта модулей при запуске бота, мс: модуль -> время"""
+    result = run_python("-X", "importtime", "-c", STARTUP_IMPORTS)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_us) / 1000
+    return times
+
+
+def test_main_import_stays_within_budget():
+    times = import_times()
+
+    heavy = [name for name in times if name.split(".")[0] in HEAVY_MODULES]
+    assert heavy == [], f"main импортирует тяжелые модули: {heavy[:5]}"
+
+    own = sum(ms for name, ms in times.items() if name.split(".")[0] in OWN_PACKAGES)
+    assert own < OWN_MODULES_BUDGET_MS, f"модули бота импортируются {own:.0f} мс"
+
+    total = sum(times.values())
+    assert total < TOTAL_BUDGET_MS, f"импорт main занимает {total:.0f} мс"
+
+
+def test_chart_worker_does_not_import_bot():
+    modules = ast.literal_eval(run_python("-c", CHART_WORKER_MODULES).stdout)
+
+    assert "matplotlib" in modules
+    bot_modules = [name for name in modules if name.split(".")[0] in BOT_ONLY_PACKAGES]
+    assert bot_modules == [], f"процесс отрисовки импортирует бота: {bot_modules[:5]}"
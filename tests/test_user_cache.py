@@ -0,0 +1,37 @@
+# tests/test_user_cache.py
+"""Кэш профилей перед get_user: попадания, промахи, вытеснения и сброс при записи."""
+import asyncio
+
+import pytest
+
+from database import crud
+from database.pool import ConnectionPool
+from utils.cache import TTLCache
+
+
+@pytest.fixture
+def crud_pool(db, tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "fitness.db"), size=1)
+    monkeypatch.setattr(crud, "pool", pool)
+    monkeypatch.setattr(crud, "user_cache", TTLCache(maxsize=2, ttl=600))
+    return pool
+
+
+def test_counters_and_invalidation(crud_pool):
+    async def scenario():
+        for user_id in (1, 2, 3):
+            await crud.create_or_update_user({"user_id": user_id, "weight": 70.0})
+        await crud.get_user(1)                      # промах
+        await crud.get_user(1)                      # попадание
+        await crud.create_or_update_user({"user_id": 1, "weight": 75.0})
+        user = await crud.get_user(1)               # промах: запись сбросила профиль
+        await crud.get_user(2)
+        await crud.get_user(3)                      # вытесняет самый давний (1)
+        await crud_pool.close()
+        return user
+
+    user = asyncio.run(scenario())
+    assert user.weight == 75.0
+    stats = crud.get_user_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 1)
+    assert stats["size"] == 2
@@ -0,0 +1,76 @@
+# tests/test_weather.py
+"""Погода: ошибки API не роняют вызывающий код, но попадают в журнал."""
+import asyncio
+import logging
+
+import aiohttp
+import pytest
+
+from services import weather
+
+
+class FakeResponse:
+    def __init__(self, status: int, payload: dict = None):
+        self.status = status
+        self._payload = payload
+        self.request_info = None
+        self.history = ()
+
+    async def json(self):
+        return self._payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, response=None, error: Exception = None):
+        self.response = response
+        self.error = error
+        self.calls = 0
+
+    def get(self, url, params):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    weather._weather_cache.clear()
+
+
+@pytest.mark.parametrize("session", [
+    FakeSession(FakeResponse(500)),
+    FakeSession(FakeResponse(200, {"cod": 200})),
+    FakeSession(error=aiohttp.ClientConnectionError("connection refused")),
+    FakeSession(error=asyncio.TimeoutError()),
+])
+def test_api_failure_is_logged_with_city(caplog, session):
+    with caplog.at_level(logging.WARNING):
+        temperature = asyncio.run(weather.get_current_temperature("Москва", session))
+
+    assert temperature == weather.DEFAULT_TEMPERATURE
+    assert "Москва" in caplog.text
+    assert caplog.records[-1].exc_info is not None
+    # Сбой не кэшируется: следующий запрос снова идет в API
+    assert "moskva" not in weather._weather_cache
+
+
+def test_unknown_city_is_cached_without_warning(caplog):
+    session = FakeSession(FakeResponse(404))
+    with caplog.at_level(logging.WARNING):
+        assert asyncio.run(weather.fetch_temperature("Нигдеград", session)) is None
+        assert asyncio.run(weather.fetch_temperature("нигдеград", session)) is None
+
+    assert session.calls == 1
+    assert caplog.records == []
+
+
+def test_programming_error_is_not_swallowed():
+    with pytest.raises(AttributeError):
+        asyncio.run(weather.fetch_temperature("Москва", FakeSession(error=AttributeError("get"))))
@@ -0,0 +1,66 @@
+# tests/test_webhook.py
+"""Режим webhook: без секретного токена сервер не запускается и не принимает обновления."""
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiohttp.test_utils import TestClient, TestServer
+
+import webhook
+from middlewares.concurrency_middleware import ConcurrencyLimitMiddleware
+
+SECRET = "test_secret-123"
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1, "date": 0, "text": "/start",
+        "chat": {"id": 1, "type": "private"},
+        "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+    },
+}
+
+
+@pytest.fixture
+def webhook_settings(monkeypatch):
+    monkeypatch.setattr(webhook.settings, "WEBHOOK_URL", "https://bot.example.com")
+    monkeypatch.setattr(webhook.settings, "WEBHOOK_SECRET", SECRET)
+    return webhook.settings
+
+
+@pytest.mark.parametrize("secret", [None, "", "секрет", "with space", "x" * 257])
+def test_webhook_requires_valid_secret(webhook_settings, monkeypatch, secret):
+    monkeypatch.setattr(webhook_settings, "WEBHOOK_SECRET", secret)
+    with pytest.raises(ValueError, match="WEBHOOK_SECRET"):
+        asyncio.run(webhook.run_webhook(Bot("123456:TEST"), Dispatcher(),
+                                        ConcurrencyLimitMiddleware(1)))
+
+
+def test_update_without_secret_is_rejected(webhook_settings):
+    async def post(headers: dict) -> int:
+        bot = Bot("123456:TEST")
+        app = webhook.create_app(bot, Dispatcher(), ConcurrencyLimitMiddleware(1))
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(webhook_settings.WEBHOOK_PATH,
+                                         json=UPDATE, headers=headers)
+            return response.status
+
+    assert asyncio.run(post({})) == 401
+    assert asyncio.run(post({"X-Telegram-Bot-Api-Secret-Token": "wrong"})) == 401
+    assert asyncio.run(post({"X-Telegram-Bot-Api-Secret-Token": SECRET})) == 200
+
+
+def test_health_reports_search_stats(webhook_settings):
+    async def get_health() -> dict:
+        bot = Bot("123456:TEST")
+        app = webhook.create_app(bot, Dispatcher(), ConcurrencyLimitMiddleware(1))
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/health")
+            assert response.status == 200
+            return await response.json()
+
+    health = asyncio.run(get_health())
+    assert health["updates"] == {"limit": 1, "active": 0, "waiting": 0}
+    assert {"hits", "misses", "evictions", "hit_rate"} <= health["user_cache"].keys()
+    assert health["food_search"]["breaker"]["state"] == "closed"
+    assert {"last_ms", "average_ms", "errors"} <= health["food_search"].keys()
+    assert {"hits", "misses", "hit_rate"} <= health["food_search"]["cache"].keys()
@@ -0,0 +1,110 @@
+# tests/test_weekly_summary.py
+"""Недельная статистика и daily_totals против наивного подсчета по журналам."""
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+from database.crud import _get_weekly_summary, _upsert_daily_totals
+from database.records import DaySummary
+from database.rollup import find_mismatched_totals, rebuild_daily_totals
+
+USER_ID = 1001
+OTHER_USER_ID = 2002
+
+
+def reference_weekly_summary(conn, user_id: int):
+    """Наивная реализация: каждая запись журнала перебирается отдельно"""
+    today = date.fromisoformat(conn.execute("SELECT DATE('now')").fetchone()[0])
+    days = [today - timedelta(days=offset) for offset in range(6, -1, -1)]
+    water, calories, workouts = defaultdict(float), defaultdict(float), defaultdict(int)
+
+    for day, amount in conn.execute(
+            "SELECT DATE(timestamp), amount FROM water_logs WHERE user_id = ?", (user_id,)):
+        water[day] += amount
+    for day, kcal in conn.execute(
+            "SELECT DATE(timestamp), calories FROM food_logs WHERE user_id = ?", (user_id,)):
+        calories[day] += kcal
+    for (day,) in conn.execute(
+            "SELECT DATE(timestamp) FROM workout_logs WHERE user_id = ?", (user_id,)):
+        workouts[day] += 1
+
+    return [
+        DaySummary(date=day, water=water[day.isoformat()],
+                   calories=calories[day.isoformat()], workouts=workouts[day.isoformat()])
+        for day in days
+    ]
+
+
+def _log_now(conn, table: str, insert_sql: str, params: tuple, **totals):
+    """Запись за сегодня теми же выражениями, что отправляют add_*_log"""
+    conn.execute(insert_sql, params)
+    query, values = _upsert_daily_totals(table, **totals)
+    conn.execute(query, (params[0], *values))
+
+
+def _insert_at(conn, table: str, columns: str, user_id: int, day: str, *values):
+    placeholders = ", ".join("?" * (len(values) + 2))
+    conn.execute(
+        f"INSERT INTO {table} (user_id, {columns}, timestamp) VALUES ({placeholders})",
+        (user_id, *values, f"{day} 12:00:00")
+    )
+
+
+def _assert_same(actual, expected):
+    assert [s.date for s in actual] == [s.date for s in expected]
+    for got, want in zip(actual, expected):
+        assert abs(got.water - want.water) < 1e-6, got.date
+        assert abs(got.calories - want.calories) < 1e-6, got.date
+        assert got.workouts == want.workouts, got.date
+
+
+def test_fan_out_day_is_not_multiplied(db):
+    # 8 записей воды и 5 приемов пищи за день: соединение сырых журналов дало бы 40 строк
+    for amount in (250, 300, 200, 500, 250, 150, 330, 270):
+        _log_now(db, "water_logs", "INSERT INTO water_logs (user_id, amount) VALUES (?, ?)",
+                 (USER_ID, amount), water_ml=amount)
+    for kcal in (350, 120, 640, 90, 410):
+        _log_now(db, "food_logs",
+                 "INSERT INTO food_logs (user_id, food_name, calories, serving_size) VALUES (?, ?, ?, ?)",
+                 (USER_ID, "еда", kcal, 100), kcal_in=kcal)
+    _log_now(db, "workout_logs",
+             "INSERT INTO workout_logs (user_id, workout_type, duration, calories_burned) VALUES (?, ?, ?, ?)",
+             (USER_ID, "бег", 30, 300), kcal_burned=300, workouts=1)
+    db.commit()
+
+    summary = _get_weekly_summary(db, USER_ID)
+    _assert_same(summary, reference_weekly_summary(db, USER_ID))
+    assert summary[-1].water == 2250
+    assert summary[-1].calories == 1610
+    assert summary[-1].workouts == 1
+    assert find_mismatched_totals(db, USER_ID) == []
+
+
+def test_rebuilt_totals_match_reference(db):
+    rng = random.Random(6)
+    today = date.fromisoformat(db.execute("SELECT DATE('now')").fetchone()[0])
+    # Дни за пределами недели тоже есть - они не должны попасть в сводку
+    for user_id in (USER_ID, OTHER_USER_ID):
+        for offset in range(10):
+            day = (today - timedelta(days=offset)).isoformat()
+            for _ in range(rng.randint(0, 8)):
+                _insert_at(db, "water_logs", "amount", user_id, day, rng.choice((150, 250, 330, 500)))
+            for _ in range(rng.randint(0, 5)):
+                _insert_at(db, "food_logs", "food_name, calories", user_id, day,
+                           "еда", round(rng.uniform(50, 800), 1))
+            for _ in range(rng.randint(0, 2)):
+                _insert_at(db, "workout_logs", "workout_type, calories_burned", user_id, day,
+                           "бег", round(rng.uniform(100, 500), 1))
+
+    rebuild_daily_totals(db)
+    db.commit()
+
+    for user_id in (USER_ID, OTHER_USER_ID):
+        _assert_same(_get_weekly_summary(db, user_id), reference_weekly_summary(db, user_id))
+    assert find_mismatched_totals(db) == []
+
+
+def test_empty_week(db):
+    summary = _get_weekly_summary(db, USER_ID)
+    assert len(summary) == 7
+    assert all(s.water == 0 and s.calories == 0 and s.workouts == 0 for s in summary)
@@ -0,0 +1,37 @@
+# tests/test_write_queue.py
+"""Групповой коммит: ошибка одной записи не касается остальных в пачке."""
+import asyncio
+import sqlite3
+
+import pytest
+
+from database.pool import ConnectionPool
+from database.write_queue import WriteBehindQueue
+
+INSERT_WATER = "INSERT INTO water_logs (user_id, amount) VALUES (?, ?)"
+
+
+@pytest.mark.parametrize("bad_entry, error", [
+    ([(INSERT_WATER, (3,))], sqlite3.ProgrammingError),     # не хватает параметра
+    ([(INSERT_WATER, (3, 2 ** 70))], OverflowError),        # целое больше 64 бит
+    ([(INSERT_WATER,)], ValueError),                        # выражение без параметров
+])
+def test_bad_entry_fails_alone(db, tmp_path, bad_entry, error):
+    async def scenario():
+        pool = ConnectionPool(str(tmp_path / "fitness.db"), size=1)
+        queue = WriteBehindQueue(pool, max_delay=0.05)
+        results = await asyncio.gather(
+            queue.submit([(INSERT_WATER, (1, 250))]),
+            queue.submit(bad_entry),
+            queue.submit([(INSERT_WATER, (2, 500))]),
+            return_exceptions=True,
+        )
+        await queue.close()
+        await pool.close()
+        return results
+
+    first, bad, last = asyncio.run(scenario())
+    assert first is None and last is None
+    assert isinstance(bad, error)
+    rows = db.execute("SELECT user_id, amount FROM water_logs ORDER BY user_id").fetchall()
+    assert rows == [(1, 250), (2, 500)]